@@ -0,0 +1,155 @@
+"""Benchmark archive export against a synthetic media tree.
+
+    python -m bench.archive --files 2000 --users 50 --photo-size 300000 --video-size 20000000
+
+Builds ``--files`` media files spread over ``--users`` applicants, catalogs
+them and measures building the ZIP stream directly, through the
+``/media/download`` endpoint and as parallel parts (``--part-mb``). Reports
+time, MB/s and peak memory.
+"""
+
+import argparse
+import contextlib
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+import httpx
+
+from bench.common import free_port, peak_rss_mb, prepare_env, report, scratch_dir
+
+BLOCK_SIZE = 1024 * 1024
+
+
+def build_tree(media_dir: Path, files: int, users: int, photo_size: int, video_size: int,
+               video_ratio: float) -> int:
+    block = os.urandom(BLOCK_SIZE)
+    total = 0
+    videos_every = max(1, round(1 / video_ratio)) if video_ratio > 0 else 0
+    for n in range(files):
+        is_video = bool(videos_every) and n % videos_every == 0
+        kind, suffix, size = ("videos", ".mp4", video_size) if is_video else ("photos", ".jpg", photo_size)
+        path = media_dir / f"user{n % users}" / kind / f"{n:08d}{suffix}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as target:
+            target.write(n.to_bytes(8, "big"))
+            remaining = size - 8
+            while remaining > 0:
+                remaining -= target.write(block[: min(BLOCK_SIZE, remaining)])
+        total += size
+    return total
+
+
+@contextlib.contextmanager
+def _serve(app: Any) -> Iterator[str]:
+    import uvicorn
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, port=port, lifespan="off", log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def _measure(title: str, fn, as_json: bool, **extra: Any) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    results: Dict[str, Any] = {
+        **extra,
+        "archive_mb": size / 1e6,
+        "seconds": elapsed,
+        "mb_per_s": size / 1e6 / elapsed if elapsed else 0.0,
+        "traced_peak_mb": traced_peak / 1e6,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    report(title, results, as_json)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--photo-size", type=int, default=300 * 1024)
+    parser.add_argument("--video-size", type=int, default=20 * 1024 * 1024)
+    parser.add_argument("--video-ratio", type=float, default=0.05, help="share of files that are videos")
+    parser.add_argument("--part-mb", type=int, default=256, help="part size cap for the parallel export")
+    parser.add_argument("--split", choices=("size", "user"), default="size")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch media/data directory")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    with scratch_dir(args.keep) as workdir:
+        workdir = Path(workdir)
+        prepare_env(workdir)
+
+        started = time.perf_counter()
+        tree_bytes = build_tree(workdir / "media", args.files, args.users, args.photo_size, args.video_size,
+                                args.video_ratio)
+        built = time.perf_counter() - started
+
+        import config
+        import main as bot
+        from core.media.archive import stream_zip
+        from core.media.store import media_store
+
+        started = time.perf_counter()
+        cataloged = media_store.backfill()
+        report("archive/setup", {
+            "files": cataloged,
+            "tree_mb": tree_bytes / 1e6,
+            "write_s": built,
+            "catalog_s": time.perf_counter() - started,
+        }, args.json)
+
+        def direct() -> int:
+            entries, _ = bot._media_archive_entries(workdir / "media")
+            return sum(len(chunk) for chunk in stream_zip(entries))
+
+        _measure("archive/stream_zip", direct, args.json, files=cataloged)
+
+        def endpoint() -> int:
+            # A real server: the ASGI test transport would buffer the whole body.
+            # The incremental export leaves the tree in place, unlike the full download.
+            with _serve(bot.app) as base_url:
+                size = 0
+                with httpx.stream("GET", f"{base_url}/media/download", params={"since": 0, "limit": 10000},
+                                  timeout=None) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_raw():
+                        size += len(chunk)
+                return size
+
+        _measure("archive/endpoint", endpoint, args.json, files=min(cataloged, 10000))
+
+        from core.media.exports import media_exporter
+
+        def parts() -> int:
+            manifest = media_exporter.create(args.split == "user", args.part_mb * 1024 * 1024)
+            while media_exporter.status(manifest["id"])["status"] == "building":
+                time.sleep(0.01)
+            manifest = media_exporter.status(manifest["id"])
+            media_exporter.discard(manifest["id"])
+            return sum(part["size"] or 0 for part in manifest["parts"])
+
+        _measure("archive/parts", parts, args.json, files=cataloged, split=args.split, part_mb=args.part_mb,
+                 workers=config.EXPORT_WORKERS)
+        media_exporter.shutdown()
+        bot.catalog.close()
+
+
+if __name__ == "__main__":
+    main()
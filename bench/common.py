@@ -0,0 +1,75 @@
+import contextlib
+import json
+import os
+import resource
+import socket
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+from typing import ContextManager, Dict, List, Optional, Sequence
+
+BENCH_TOKEN = "123456:BENCHMARKbenchmarkBENCHMARKbench"
+
+
+def prepare_env(workdir: Path, overrides: Optional[Dict[str, str]] = None) -> None:
+    """Point the bot at a scratch directory. Must run before ``config`` is imported."""
+    if "config" in sys.modules:
+        raise RuntimeError("prepare_env() must run before the bot modules are imported")
+    os.environ.update({
+        "TELEGRAM_API_KEY": BENCH_TOKEN,
+        "ADMIN_CHAT_ID": "1",
+        "WEBHOOK_URL": "https://bench.invalid",
+        "MEDIA_DIR": str(workdir / "media"),
+        "DATA_DIR": str(workdir / "data"),
+        "WEB_CONCURRENCY": "1",
+        "UPDATE_DEDUP_PERSIST": "false",
+    })
+    os.environ.update(overrides or {})
+
+
+def scratch_dir(keep: bool) -> ContextManager[str]:
+    if keep:
+        return contextlib.nullcontext(tempfile.mkdtemp(prefix="strawberry-bench-"))
+    return tempfile.TemporaryDirectory(prefix="strawberry-bench-")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": max(values, default=0.0) * 1000,
+        "mean_ms": statistics.fmean(values) * 1000 if values else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def report(title: str, results: Dict[str, object], as_json: bool) -> None:
+    if as_json:
+        print(json.dumps({"benchmark": title, **results}, ensure_ascii=False))
+        return
+    print(f"\n{title}")
+    width = max(len(key) for key in results)
+    for key, value in results.items():
+        if isinstance(value, float):
+            value = f"{value:,.2f}"
+        print(f"  {key.ljust(width)}  {value}")
@@ -0,0 +1,167 @@
+"""Local stand-in for the Telegram Bot API.
+
+Answers the methods the bot uses with well-formed results and serves file
+downloads of the size encoded in the ``file_id`` (see ``bench.updates``).
+With ``local_dir`` it behaves like a server started with ``--local``:
+``getFile`` writes the file there and returns its absolute path.
+Runs in a separate process so it does not share the event loop or the GIL
+with the bot under test.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import multiprocessing
+import socket
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import parse_qsl
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from bench.common import free_port
+
+CHUNK_SIZE = 64 * 1024
+
+app = FastAPI()
+_message_ids = itertools.count(1)
+_latency = 0.0
+# Set in local mode: getFile writes the file here and returns its absolute path.
+_local_dir: Optional[Path] = None
+
+
+def _message(chat_id: Any, text: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "message_id": next(_message_ids),
+        "date": int(time.time()),
+        "chat": {"id": int(chat_id), "type": "private" if int(chat_id) > 0 else "group"},
+        "text": text or "",
+    }
+
+
+def _file_size(file_id: str) -> int:
+    # Synthetic ids look like "<kind>-<size>-<n>".
+    try:
+        return int(file_id.split("-")[1])
+    except (IndexError, ValueError):
+        return 1024
+
+
+def _result(method: str, params: Dict[str, Any]) -> Any:
+    method = method.lower()
+    if method == "getme":
+        return {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+    if method in ("sendmessage", "forwardmessage", "copymessage", "editmessagetext"):
+        return _message(params.get("chat_id", 1), params.get("text"))
+    if method in ("forwardmessages", "copymessages"):
+        return [{"message_id": next(_message_ids)} for _ in params.get("message_ids", [])]
+    if method == "getfile":
+        file_id = params["file_id"]
+        kind = file_id.split("-")[0]
+        file_path = f"{kind}/{file_id}"
+        if _local_dir is not None:
+            target = _local_dir / file_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with target.open("wb") as output:
+                for chunk in _chunks(file_id):
+                    output.write(chunk)
+            file_path = str(target.resolve())
+        return {
+            "file_id": file_id,
+            "file_unique_id": file_id,
+            "file_size": _file_size(file_id),
+            "file_path": file_path,
+        }
+    if method == "getwebhookinfo":
+        return {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+    if method == "getmycommands":
+        return []
+    return True
+
+
+async def _params(request: Request) -> Dict[str, Any]:
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith("application/json"):
+        return json.loads(body or b"{}")
+    # PTB sends urlencoded forms with JSON-encoded non-string values.
+    params: Dict[str, Any] = dict(parse_qsl(body.decode()))
+    if "message_ids" in params:
+        params["message_ids"] = json.loads(params["message_ids"])
+    return params
+
+
+@app.post("/bot{token}/{method}")
+async def bot_method(token: str, method: str, request: Request):
+    params = await _params(request)
+    if _latency:
+        await asyncio.sleep(_latency)
+    return JSONResponse({"ok": True, "result": _result(method, params)})
+
+
+def _chunks(file_id: str) -> Iterator[bytes]:
+    # Content depends on the id, so every synthetic file hashes differently.
+    block = (hashlib.sha256(file_id.encode()).digest() * (CHUNK_SIZE // 32))[:CHUNK_SIZE]
+    remaining = _file_size(file_id)
+    while remaining > 0:
+        chunk = block[: min(CHUNK_SIZE, remaining)]
+        remaining -= len(chunk)
+        yield chunk
+
+
+@app.get("/file/bot{token}/{kind}/{file_id}")
+async def file_download(token: str, kind: str, file_id: str):
+    return StreamingResponse(
+        _chunks(file_id),
+        media_type="application/octet-stream",
+        headers={"Content-Length": str(_file_size(file_id))},
+    )
+
+
+def _serve(port: int, latency: float, local_dir: Optional[str]) -> None:
+    import uvicorn
+
+    global _latency, _local_dir
+    _latency = latency
+    _local_dir = Path(local_dir) if local_dir else None
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+class FakeBotApi:
+    """Context manager running the stand-in server; ``base_url`` and ``file_url`` go to the bot config."""
+
+    def __init__(self, latency: float = 0.0, local_dir: Optional[Path] = None) -> None:
+        self.port = free_port()
+        self._latency = latency
+        self._local_dir = local_dir
+        self._process: Optional[multiprocessing.Process] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/bot"
+
+    @property
+    def file_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/file/bot"
+
+    def __enter__(self) -> "FakeBotApi":
+        context = multiprocessing.get_context("spawn")
+        self._process = context.Process(target=_serve, args=(self.port, self._latency, str(self._local_dir) if self._local_dir else None), daemon=True)
+        self._process.start()
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.2).close()
+                return self
+            except OSError:
+                time.sleep(0.05)
+        self.__exit__()
+        raise RuntimeError("Fake Bot API server did not start")
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(5)
+            self._process = None
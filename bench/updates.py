@@ -0,0 +1,115 @@
+"""Synthetic webhook update streams.
+
+Media ``file_id`` values encode the file size (``photos-<size>-<n>``), which
+the stand-in server uses for ``getFile`` and the download.
+"""
+
+import itertools
+import json
+import random
+import time
+from typing import Any, Dict, Iterator, List
+
+COMMANDS = (
+    "/start", "/help", "/model", "/photographer", "/makeup", "/stylist",
+    "/about_platform", "/equipment", "/privacy_rules", "/portfolio", "/next_steps",
+)
+
+SCENARIOS = ("commands", "callbacks", "albums", "videos", "mixed")
+
+
+class UpdateFactory:
+    def __init__(self, chats: int, photo_size: int, video_size: int, seed: int = 1) -> None:
+        self._chats = max(1, chats)
+        self._photo_size = photo_size
+        self._video_size = video_size
+        self._random = random.Random(seed)
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._files = itertools.count(1)
+        self._groups = itertools.count(1)
+
+    def _chat(self) -> Dict[str, Any]:
+        chat_id = 100000 + self._random.randrange(self._chats)
+        return {"id": chat_id, "type": "private", "first_name": "Bench", "username": f"user{chat_id}"}
+
+    def _message(self, chat: Dict[str, Any], **fields: Any) -> Dict[str, Any]:
+        sender = {"id": chat["id"], "is_bot": False, "first_name": "Bench", "username": chat["username"]}
+        return {"message_id": next(self._message_ids), "date": int(time.time()), "chat": chat, "from": sender, **fields}
+
+    def _update(self, **fields: Any) -> Dict[str, Any]:
+        return {"update_id": next(self._update_ids), **fields}
+
+    def command(self) -> Dict[str, Any]:
+        text = self._random.choice(COMMANDS)
+        entities = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+        return self._update(message=self._message(self._chat(), text=text, entities=entities))
+
+    def callback(self) -> Dict[str, Any]:
+        chat = self._chat()
+        data = self._random.choice(("model_order_webcam", "model_order_studio"))
+        return self._update(callback_query={
+            "id": str(next(self._update_ids)),
+            "from": {"id": chat["id"], "is_bot": False, "first_name": "Bench"},
+            "chat_instance": str(chat["id"]),
+            "data": data,
+            "message": self._message(chat, text="Выберите формат"),
+        })
+
+    def _photo(self, n: int) -> List[Dict[str, Any]]:
+        file_id = f"photos-{self._photo_size}-{n}"
+        return [
+            {"file_id": f"thumb-{n}", "file_unique_id": f"thumb-{n}", "width": 90, "height": 90},
+            {"file_id": file_id, "file_unique_id": file_id, "width": 1280, "height": 960,
+             "file_size": self._photo_size},
+        ]
+
+    def photo(self) -> Dict[str, Any]:
+        return self._update(message=self._message(self._chat(), photo=self._photo(next(self._files))))
+
+    def album(self, size: int) -> List[Dict[str, Any]]:
+        chat = self._chat()
+        group_id = f"group-{next(self._groups)}"
+        return [
+            self._update(message=self._message(chat, photo=self._photo(next(self._files)), media_group_id=group_id))
+            for _ in range(size)
+        ]
+
+    def video(self) -> Dict[str, Any]:
+        file_id = f"videos-{self._video_size}-{next(self._files)}"
+        video = {
+            "file_id": file_id, "file_unique_id": file_id, "width": 1920, "height": 1080,
+            "duration": 60, "mime_type": "video/mp4", "file_size": self._video_size,
+        }
+        return self._update(message=self._message(self._chat(), video=video))
+
+    def stream(self, scenario: str, count: int) -> Iterator[Dict[str, Any]]:
+        """``count`` updates of one scenario; albums yield 2-10 items each."""
+        produced = 0
+        while produced < count:
+            kind = scenario
+            if scenario == "mixed":
+                kind = self._random.choices(("commands", "callbacks", "photos", "albums", "videos"),
+                                            weights=(50, 20, 15, 10, 5))[0]
+            if kind == "commands":
+                batch = [self.command()]
+            elif kind == "callbacks":
+                batch = [self.callback()]
+            elif kind == "photos":
+                batch = [self.photo()]
+            elif kind == "albums":
+                batch = self.album(self._random.randint(2, 10))
+            else:
+                batch = [self.video()]
+            for update in batch[: count - produced]:
+                produced += 1
+                yield update
+
+
+def encode(updates: Iterator[Dict[str, Any]]) -> List[bytes]:
+    # Telegram puts update_id first; keep that so the dedup fast path is exercised.
+    return [json.dumps(update, ensure_ascii=False).encode() for update in updates]
+
+
+def is_media(body: bytes) -> bool:
+    return b'"photo"' in body or b'"video"' in body
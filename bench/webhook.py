@@ -0,0 +1,154 @@
+"""Replay synthetic update streams into the FastAPI app.
+
+The bot runs with its real lifespan against the local stand-in Bot API, so
+handlers, the download pipeline and the album batcher do their usual work.
+
+    python -m bench.webhook --scenario all --updates 2000 --concurrency 64
+
+Reports webhook acknowledge throughput and p50/p99 latency, the time until
+every update was handled and every download finished, and peak memory.
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+from bench.common import latency_summary, peak_rss_mb, prepare_env, report, scratch_dir
+from bench.fake_bot_api import FakeBotApi
+from bench.updates import SCENARIOS, UpdateFactory, encode, is_media
+
+UNTHROTTLED = {
+    "OUTBOUND_GLOBAL_RATE": "1000000",
+    "OUTBOUND_CHAT_RATE": "1000000",
+    "OUTBOUND_CHAT_BURST": "1000000",
+    "OUTBOUND_GROUP_RATE": "1000000",
+    "OUTBOUND_GROUP_BURST": "1000000",
+    "INBOUND_USER_RATE": "0",
+    "INBOUND_UPLOAD_BUDGET_MB": "0",
+}
+
+
+async def _post_all(client: httpx.AsyncClient, path: str, bodies: List[bytes], concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    pending = iter(bodies)
+
+    async def sender() -> None:
+        for body in pending:
+            started = time.perf_counter()
+            response = await client.post(path, content=body, headers={"content-type": "application/json"})
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(sender() for _ in range(concurrency)))
+    return {"latencies": latencies, "statuses": statuses}
+
+
+def _finished_downloads(*statuses: str) -> float:
+    from core.utils.metrics import DOWNLOADS
+
+    return sum(DOWNLOADS.value(kind, status) for kind in ("photos", "videos") for status in statuses)
+
+
+async def _drain(main: Any, downloads_before: float, media: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        finished = _finished_downloads("done", "failed")
+        if main.dispatcher.size == 0 and finished - downloads_before >= media:
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+async def run(args: argparse.Namespace) -> None:
+    import main
+    from core.utils.metrics import DOWNLOAD_BYTES
+
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    factory = UpdateFactory(args.chats, args.photo_size, args.video_size)
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in scenarios:
+                bodies = encode(factory.stream(scenario, args.updates))
+                media = sum(1 for body in bodies if is_media(body))
+                downloads_before = _finished_downloads("done", "failed")
+                bytes_before = DOWNLOAD_BYTES.value()
+                if args.tracemalloc:
+                    tracemalloc.reset_peak()
+
+                started = time.perf_counter()
+                sent = await _post_all(client, main.WEBHOOK_PATH, bodies, args.concurrency)
+                acked = time.perf_counter() - started
+                drained = await _drain(main, downloads_before, media, args.timeout)
+                finished = time.perf_counter() - started
+
+                failed = _finished_downloads("failed")
+                results: Dict[str, Any] = {
+                    "updates": len(bodies),
+                    "media_updates": media,
+                    "ack_updates_per_s": len(bodies) / acked if acked else 0.0,
+                    **{f"ack_{key}": value for key, value in latency_summary(sent["latencies"]).items()},
+                    "statuses": dict(sorted(sent["statuses"].items())),
+                    "end_to_end_s": finished,
+                    "end_to_end_updates_per_s": len(bodies) / finished if finished else 0.0,
+                    "drained": drained,
+                    "downloaded_mb": (DOWNLOAD_BYTES.value() - bytes_before) / 1e6,
+                    "download_failures_total": failed,
+                    "peak_rss_mb": peak_rss_mb(),
+                }
+                if args.tracemalloc:
+                    results["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+                report(f"webhook/{scenario}", results, args.json)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--updates", type=int, default=1000, help="updates per scenario")
+    parser.add_argument("--concurrency", type=int, default=32, help="parallel webhook requests")
+    parser.add_argument("--chats", type=int, default=200, help="distinct synthetic chats")
+    parser.add_argument("--photo-size", type=int, default=300 * 1024)
+    parser.add_argument("--video-size", type=int, default=50 * 1024 * 1024)
+    parser.add_argument("--api-latency", type=float, default=0.02, help="seconds per stand-in Bot API call")
+    parser.add_argument("--local-mode", action="store_true",
+                        help="stand-in behaves like a --local Bot API server sharing its file directory")
+    parser.add_argument("--throttled", action="store_true", help="keep the production outbound and per-user inbound limits")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for the backlog to drain")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report the Python heap peak (slower)")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch media/data directory")
+    parser.add_argument("--json", action="store_true", help="one JSON object per scenario")
+    args = parser.parse_args()
+
+    with scratch_dir(args.keep) as workdir:
+        local_dir = Path(workdir) / "bot-api" if args.local_mode else None
+        with FakeBotApi(args.api_latency, local_dir) as api:
+            _run_against(api, Path(workdir), args)
+
+
+def _run_against(api: FakeBotApi, workdir: Path, args: argparse.Namespace) -> None:
+    overrides = {
+        "BOT_API_BASE_URL": api.base_url,
+        "BOT_API_FILE_URL": api.file_url,
+        "ALBUM_WINDOW": "0.2",
+        "PREVIEW_WORKERS": "1",
+    }
+    if args.local_mode:
+        overrides["BOT_API_LOCAL_MODE"] = "true"
+    if not args.throttled:
+        overrides.update(UNTHROTTLED)
+    prepare_env(workdir, overrides)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
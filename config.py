@@ -9,3 +9,92 @@ WEBHOOK_URL = os.environ.get("WEBHOOK_URL")
 WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "/telegram/webhook")
 HOST = os.environ.get("HOST", "0.0.0.0")
 PORT = int(os.environ.get("PORT", "8000"))
+
+UPDATE_WORKERS = int(os.environ.get("UPDATE_WORKERS", "8"))
+UPDATE_QUEUE_SIZE = int(os.environ.get("UPDATE_QUEUE_SIZE", "1000"))
+UPDATE_DRAIN_TIMEOUT = float(os.environ.get("UPDATE_DRAIN_TIMEOUT", "10"))
+# Updates still queued after the drain timeout are saved and replayed by the next process.
+UPDATE_REPLAY_INTERVAL = float(os.environ.get("UPDATE_REPLAY_INTERVAL", "5"))
+
+MEDIA_DIR = os.environ.get("MEDIA_DIR", "media")
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+
+DOWNLOAD_WORKERS = int(os.environ.get("DOWNLOAD_WORKERS", "4"))
+DOWNLOAD_MAX_ATTEMPTS = int(os.environ.get("DOWNLOAD_MAX_ATTEMPTS", "5"))
+DOWNLOAD_RETRY_DELAY = float(os.environ.get("DOWNLOAD_RETRY_DELAY", "1"))
+# Seconds running downloads get to finish on shutdown; unfinished jobs are picked up by another process.
+DOWNLOAD_DRAIN_TIMEOUT = float(os.environ.get("DOWNLOAD_DRAIN_TIMEOUT", "15"))
+DOWNLOAD_RECLAIM_INTERVAL = float(os.environ.get("DOWNLOAD_RECLAIM_INTERVAL", "30"))
+
+ALBUM_WINDOW = float(os.environ.get("ALBUM_WINDOW", "1.5"))
+ALBUM_RECOVERY_INTERVAL = float(os.environ.get("ALBUM_RECOVERY_INTERVAL", "10"))
+
+ADMIN_DIGEST_WINDOW = float(os.environ.get("ADMIN_DIGEST_WINDOW", "60"))
+ADMIN_DIGEST_MAX_FINGERPRINTS = int(os.environ.get("ADMIN_DIGEST_MAX_FINGERPRINTS", "100"))
+
+OUTBOUND_GLOBAL_RATE = float(os.environ.get("OUTBOUND_GLOBAL_RATE", "30"))
+OUTBOUND_CHAT_RATE = float(os.environ.get("OUTBOUND_CHAT_RATE", "1"))
+OUTBOUND_CHAT_BURST = float(os.environ.get("OUTBOUND_CHAT_BURST", "3"))
+OUTBOUND_GROUP_RATE = float(os.environ.get("OUTBOUND_GROUP_RATE", str(20 / 60)))
+OUTBOUND_GROUP_BURST = float(os.environ.get("OUTBOUND_GROUP_BURST", "3"))
+OUTBOUND_MAX_RETRIES = int(os.environ.get("OUTBOUND_MAX_RETRIES", "3"))
+
+# Point these at a local Bot API server (or the benchmark stand-in).
+BOT_API_BASE_URL = os.environ.get("BOT_API_BASE_URL", "https://api.telegram.org/bot")
+BOT_API_FILE_URL = os.environ.get("BOT_API_FILE_URL", "https://api.telegram.org/file/bot")
+# Self-hosted Bot API server started with --local: no 20 MB limit, getFile returns paths
+# on the server's disk. If that directory is mounted elsewhere here, map ROOT to MOUNT.
+BOT_API_LOCAL_MODE = os.environ.get("BOT_API_LOCAL_MODE", "").lower() in ("1", "true", "yes")
+BOT_API_LOCAL_ROOT = os.environ.get("BOT_API_LOCAL_ROOT", "")
+BOT_API_LOCAL_MOUNT = os.environ.get("BOT_API_LOCAL_MOUNT", "")
+# Move files out of the server's directory instead of hardlinking them.
+BOT_API_LOCAL_MOVE = os.environ.get("BOT_API_LOCAL_MOVE", "").lower() in ("1", "true", "yes")
+
+BOT_API_POOL_SIZE = int(os.environ.get("BOT_API_POOL_SIZE", "16"))
+BOT_API_CONNECT_TIMEOUT = float(os.environ.get("BOT_API_CONNECT_TIMEOUT", "5"))
+BOT_API_READ_TIMEOUT = float(os.environ.get("BOT_API_READ_TIMEOUT", "10"))
+BOT_API_WRITE_TIMEOUT = float(os.environ.get("BOT_API_WRITE_TIMEOUT", "10"))
+BOT_API_POOL_TIMEOUT = float(os.environ.get("BOT_API_POOL_TIMEOUT", "5"))
+BOT_API_KEEPALIVE = float(os.environ.get("BOT_API_KEEPALIVE", "60"))
+BOT_API_HTTP2 = os.environ.get("BOT_API_HTTP2", "").lower() in ("1", "true", "yes")
+
+FILE_POOL_SIZE = int(os.environ.get("FILE_POOL_SIZE", "4"))
+FILE_CONNECT_TIMEOUT = float(os.environ.get("FILE_CONNECT_TIMEOUT", "10"))
+FILE_READ_TIMEOUT = float(os.environ.get("FILE_READ_TIMEOUT", "60"))
+FILE_POOL_TIMEOUT = float(os.environ.get("FILE_POOL_TIMEOUT", "30"))
+FILE_KEEPALIVE = float(os.environ.get("FILE_KEEPALIVE", "30"))
+FILE_HTTP2 = os.environ.get("FILE_HTTP2", "").lower() in ("1", "true", "yes")
+
+# Number of uvicorn worker processes (uvicorn reads the same variable).
+WEB_CONCURRENCY = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+# Seconds between attempts of a follower worker to become the leader.
+LEADER_RETRY_INTERVAL = float(os.environ.get("LEADER_RETRY_INTERVAL", "5"))
+
+UPDATE_DEDUP_SIZE = int(os.environ.get("UPDATE_DEDUP_SIZE", "10000"))
+UPDATE_DEDUP_PERSIST = os.environ.get("UPDATE_DEDUP_PERSIST", "true").lower() in ("1", "true", "yes")
+UPDATE_DEDUP_TTL = float(os.environ.get("UPDATE_DEDUP_TTL", str(24 * 60 * 60)))
+
+PREVIEW_WORKERS = int(os.environ.get("PREVIEW_WORKERS", "2"))
+PREVIEW_SIZE = int(os.environ.get("PREVIEW_SIZE", "320"))
+
+# 0 disables the quota; exported files are still deleted.
+MEDIA_QUOTA_MB = int(os.environ.get("MEDIA_QUOTA_MB", "0"))
+RETENTION_INTERVAL = float(os.environ.get("RETENTION_INTERVAL", "300"))
+RETENTION_EXPORTED_TTL = float(os.environ.get("RETENTION_EXPORTED_TTL", "0"))
+RETENTION_TMP_TTL = float(os.environ.get("RETENTION_TMP_TTL", "3600"))
+
+METRICS_DUMP_INTERVAL = float(os.environ.get("METRICS_DUMP_INTERVAL", "5"))
+
+# Seconds between write-behind flushes of conversation states.
+PERSISTENCE_FLUSH_INTERVAL = float(os.environ.get("PERSISTENCE_FLUSH_INTERVAL", "5"))
+
+# Per-user limits on incoming updates and uploaded bytes; 0 disables a limit.
+INBOUND_USER_RATE = float(os.environ.get("INBOUND_USER_RATE", "0.5"))
+INBOUND_USER_BURST = int(os.environ.get("INBOUND_USER_BURST", "30"))
+INBOUND_UPLOAD_BUDGET_MB = int(os.environ.get("INBOUND_UPLOAD_BUDGET_MB", "500"))
+INBOUND_UPLOAD_WINDOW = float(os.environ.get("INBOUND_UPLOAD_WINDOW", "3600"))
+
+# Parallel, multi-part exports (see core.media.exports).
+EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", str(os.cpu_count() or 2)))
+EXPORT_PART_MB = int(os.environ.get("EXPORT_PART_MB", "2048"))
+EXPORT_TTL = float(os.environ.get("EXPORT_TTL", str(24 * 60 * 60)))
@@ -1,13 +1,12 @@
 import logging
-import os
-from datetime import datetime
 from typing import Optional
 
 from telegram import Update
 from telegram.ext import ContextTypes
 
-import config
 from core.keyboards.inlines import model_experience
+from core.media.albums import album_batcher
+from core.media.downloads import DownloadJob, download_pipeline
 from core.texts import basic
 from core.texts.models.texts import (
     ABOUT_PLATFORM,
@@ -19,25 +18,41 @@ from core.texts.photographer.texts import PHOTOGRAPHER_ORDER_DEFAULT
 
 logger = logging.getLogger(__name__)
 
-
-def _user_folder(username: Optional[str], folder: str) -> str:
-    safe_name = username or "anonymous"
-    return os.path.join("media", safe_name, folder)
-
-
-async def _forward_media_to_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    if not (config.ADMIN_CHAT_ID and update.effective_message):
-        return
-
-    try:
-        forwarded_message = await context.bot.forward_message(
-            chat_id=config.ADMIN_CHAT_ID,
-            from_chat_id=update.effective_chat.id,
-            message_id=update.effective_message.id,
-        )
-        logger.info("Forwarded message to admin: %s", forwarded_message)
-    except Exception as exc:  # pragma: no cover - defensive admin forwarding
-        logger.exception("Failed to forward media to admin: %s", exc)
+# Commands that always answer with the same text, keyed by command name.
+# They can be answered inline in the webhook response (see core.utils.inline_replies).
+STATIC_REPLIES = {
+    "start": basic.START_TEXT,
+    "help": basic.HELP_TEXT,
+    "privacy_rules": basic.CONFIDENTIALITY_POLICY,
+    "about_platform": ABOUT_PLATFORM,
+    "portfolio": basic.PORTFOLIO_REQUIREMENTS,
+    "next_steps": basic.NEXT_STEPS,
+    "equipment": MODEL_EQUIPMENT,
+    "photographer": PHOTOGRAPHER_ORDER_DEFAULT,
+    "makeup": basic.MAKEUP_NO_VACANCIES,
+    "stylist": basic.STYLIST_NO_VACANCIES,
+}
+
+
+def _user_name(username: Optional[str]) -> str:
+    return username or "anonymous"
+
+
+def _download_job(update: Update, file_id: str, file_unique_id: str, kind: str, suffix: str) -> DownloadJob:
+    message = update.message
+    return DownloadJob(
+        chat_id=message.chat_id,
+        message_id=message.message_id,
+        user=_user_name(message.from_user.username if message.from_user else None),
+        kind=kind,
+        suffix=suffix,
+        file_id=file_id,
+        file_unique_id=file_unique_id,
+        media_group_id=message.media_group_id,
+        user_id=message.from_user.id if message.from_user else None,
+        # Album items are forwarded in bulk by the album batcher.
+        forwarded=bool(message.media_group_id),
+    )
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -53,76 +68,32 @@ async def get_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.message or not update.message.photo:
         return
 
-    try:
-        await _forward_media_to_admin(update, context)
-
-        user_name = update.message.from_user.username if update.message.from_user else "anonymous"
-        folder_path = _user_folder(user_name, "photos")
-        os.makedirs(folder_path, exist_ok=True)
-
-        largest_photo = update.message.photo[-1]
-        try:
-            file = await context.bot.get_file(largest_photo.file_id)
-            logger.info("FILE INFO: %s", file)
-        except Exception as exc:
-            logger.exception("Failed to retrieve photo file: %s", exc)
-            raise
-        unique_file_name = datetime.now().strftime("%Y%m%d%H%M%S%f")[:-3] + ".jpg"
-        await file.download_to_drive(custom_path=os.path.join(folder_path, unique_file_name))
-
-        if config.ADMIN_CHAT_ID:
-            await context.bot.send_message(chat_id=config.ADMIN_CHAT_ID, text=user_name)
-
-        await update.message.reply_text(f"Photo added to {user_name} portfolio")
-    except Exception as exc:  # pragma: no cover - defensive media handling
-        logger.exception("Failed to process photo: %s", exc)
-        if config.ADMIN_CHAT_ID:
-            try:
-                await context.bot.send_message(
-                    chat_id=config.ADMIN_CHAT_ID,
-                    text=f"Не удалось обработать фото пользователя: {exc}",
-                )
-            except Exception:  # pragma: no cover - best-effort notification
-                logger.debug("Admin notification failed during photo error handling")
-
-        if update.message:
-            await update.message.reply_text("Произошла ошибка при обработке фото. Попробуйте позже.")
+    largest_photo = update.message.photo[-1]
+    job = _download_job(update, largest_photo.file_id, largest_photo.file_unique_id, "photos", ".jpg")
+    await download_pipeline.enqueue(job)
+
+    if job.media_group_id:
+        # One acknowledgement per album, sent by the batcher.
+        await album_batcher.add(update.message, job.user)
+        return
+
+    await update.message.reply_text(f"Photo added to {job.user} portfolio")
 
 
 async def get_video(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.message or not update.message.video:
         return
 
-    try:
-        await _forward_media_to_admin(update, context)
-
-        user_name = update.message.from_user.username if update.message.from_user else "anonymous"
-        folder_path = _user_folder(user_name, "videos")
-        os.makedirs(folder_path, exist_ok=True)
-
-        try:
-            file = await context.bot.get_file(update.message.video.file_id)
-            logger.info("FILE INFO: %s", file)
-        except Exception as exc:
-            logger.exception("Failed to retrieve video file: %s", exc)
-            raise
-        unique_file_name = datetime.now().strftime("%Y%m%d%H%M%S") + ".mp4"
-        await file.download_to_drive(custom_path=os.path.join(folder_path, unique_file_name))
-
-        await update.message.reply_text(f"Video added to {user_name} portfolio")
-    except Exception as exc:  # pragma: no cover - defensive media handling
-        logger.exception("Failed to process video: %s", exc)
-        if config.ADMIN_CHAT_ID:
-            try:
-                await context.bot.send_message(
-                    chat_id=config.ADMIN_CHAT_ID,
-                    text=f"Не удалось обработать видео пользователя: {exc}",
-                )
-            except Exception:  # pragma: no cover - best-effort notification
-                logger.debug("Admin notification failed during video error handling")
-
-        if update.message:
-            await update.message.reply_text("Произошла ошибка при обработке видео. Попробуйте позже.")
+    video = update.message.video
+    job = _download_job(update, video.file_id, video.file_unique_id, "videos", ".mp4")
+    await download_pipeline.enqueue(job)
+
+    if job.media_group_id:
+        # One acknowledgement per album, sent by the batcher.
+        await album_batcher.add(update.message, job.user)
+        return
+
+    await update.message.reply_text(f"Video added to {job.user} portfolio")
 
 
 async def model_recruiter_experience(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -155,16 +126,12 @@ async def photographer_recruiter_experience(update: Update, context: ContextType
 
 async def makeup_recruiter_experience(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if update.message:
-        await update.message.reply_text(
-            "В данный момент, к сожалению, нет открытых вакансий на позицию визажиста"
-        )
+        await update.message.reply_text(basic.MAKEUP_NO_VACANCIES)
 
 
 async def stylist_recruiter_experience(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if update.message:
-        await update.message.reply_text(
-            "В данный момент, к сожалению, нет открытых вакансий на позицию стилиста"
-        )
+        await update.message.reply_text(basic.STYLIST_NO_VACANCIES)
 
 
 async def equipment_help(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
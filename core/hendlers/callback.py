@@ -1,6 +1,7 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from core.hendlers.survey import start_survey
 from core.texts.models.texts import MODEL_ORDER_WEBCAM
 
 
@@ -19,3 +20,7 @@ async def model_order(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         await call.message.reply_text(answer)
 
     await call.answer()
+
+    # Webcam applicants go straight on to the survey.
+    if experience == "webcam":
+        await start_survey(update, context)
@@ -0,0 +1,73 @@
+import logging
+import time
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+import config
+from core.texts.models.texts import SURVEY_CANCELLED, SURVEY_DONE, SURVEY_INTRO, survey_questions
+from core.utils.persistence import conversation_states
+
+
+logger = logging.getLogger(__name__)
+
+# Key of the survey in the conversation store; the step is len(answers).
+SURVEY = "survey"
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+async def start_survey(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not update.effective_user:
+        return
+    state = {"answers": [], "started_at": time.time()}
+    conversation_states.set(SURVEY, update.effective_user.id, state)
+    await update.effective_chat.send_message(SURVEY_INTRO)
+    await update.effective_chat.send_message(survey_questions[0])
+
+
+async def survey_answer(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not update.message or not update.effective_user:
+        return
+    survey = await conversation_states.get(SURVEY, update.effective_user.id)
+    # Text outside a running survey is left alone.
+    if survey is None or "completed_at" in survey:
+        return
+
+    survey["answers"].append(update.message.text)
+    if len(survey["answers"]) == len(survey_questions):
+        survey["completed_at"] = time.time()
+    conversation_states.set(SURVEY, update.effective_user.id, survey)
+
+    answers = survey["answers"]
+    if "completed_at" not in survey:
+        await update.message.reply_text(survey_questions[len(answers)])
+        return
+
+    await update.message.reply_text(SURVEY_DONE)
+    await _send_to_admin(update, context, answers)
+
+
+async def cancel_survey(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if update.effective_user:
+        conversation_states.delete(SURVEY, update.effective_user.id)
+    await update.effective_chat.send_message(SURVEY_CANCELLED)
+
+
+async def _send_to_admin(update: Update, context: ContextTypes.DEFAULT_TYPE, answers: list) -> None:
+    if not config.ADMIN_CHAT_ID:
+        return
+
+    user = update.effective_user
+    name = f"@{user.username}" if user and user.username else str(user.id if user else "anonymous")
+    lines = [f"Анкета {name}:"]
+    for question, answer in zip(survey_questions, answers):
+        lines.append(f"\n{question}\n— {answer}")
+    text = "\n".join(lines)
+    if len(text) > MAX_MESSAGE_LENGTH:
+        text = text[: MAX_MESSAGE_LENGTH - 1] + "…"
+
+    try:
+        await context.bot.send_message(chat_id=config.ADMIN_CHAT_ID, text=text)
+    except Exception as exc:  # pragma: no cover - best-effort admin notification
+        logger.exception("Failed to send survey to admin: %s", exc)
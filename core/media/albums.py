@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from telegram import Bot, Message, ReplyParameters
+
+import config
+from core.utils.sqlite import SQLiteStore
+
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS album_items (
+    group_id TEXT NOT NULL,
+    chat_id INTEGER NOT NULL,
+    user TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    added_at REAL NOT NULL,
+    PRIMARY KEY (group_id, message_id)
+)
+"""
+
+
+class AlbumStore(SQLiteStore):
+    """Album items shared by all worker processes of the deployment."""
+
+    _schema = (_SCHEMA,)
+
+    def add(self, group_id: str, chat_id: int, user: str, message_id: int) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO album_items (group_id, chat_id, user, message_id, added_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (group_id, chat_id, user, message_id, time.time()),
+            )
+            conn.commit()
+
+    def last_added(self, group_id: str) -> Optional[float]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT MAX(added_at) AS added_at FROM album_items WHERE group_id = ?", (group_id,)
+            ).fetchone()
+        return row["added_at"]
+
+    def groups(self) -> List[str]:
+        with self._lock:
+            rows = self._connection().execute("SELECT DISTINCT group_id FROM album_items").fetchall()
+        return [row["group_id"] for row in rows]
+
+    def claim(self, group_id: str) -> Optional[Tuple[int, str, List[int]]]:
+        """Atomically take the album items; ``None`` if another process took them."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT chat_id, user, message_id FROM album_items WHERE group_id = ? ORDER BY message_id",
+                (group_id,),
+            ).fetchall()
+            conn.execute("DELETE FROM album_items WHERE group_id = ?", (group_id,))
+
+        if not rows:
+            return None
+        return rows[0]["chat_id"], rows[0]["user"], [row["message_id"] for row in rows]
+
+
+class AlbumBatcher:
+    """Collects the messages of one media group for a short window.
+
+    Once the window passes without new items the whole album is forwarded to
+    the admin with a single ``forward_messages`` call, followed by one admin
+    notification and one acknowledgement to the user. Items are kept in a
+    shared store, so an album split across worker processes is still sent
+    once, by whichever process claims it first. Albums still being collected
+    when a process stops stay in the store; every ``recovery_interval``
+    seconds running processes pick up such albums.
+    """
+
+    def __init__(self, store: AlbumStore, window: float, recovery_interval: float) -> None:
+        self._store = store
+        self._window = window
+        self._recovery_interval = recovery_interval
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._flushing: List[asyncio.Task] = []
+        self._bot: Optional[Bot] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def start(self, bot: Bot) -> None:
+        self._bot = bot
+        self._stopping = False
+        if self._task is None:
+            self._task = asyncio.create_task(self._recover(), name="album-recovery")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Unfinished albums stay in the store, so the next instance sends them whole.
+        self._stopping = True
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        await asyncio.gather(*self._flushing, return_exceptions=True)
+        self._store.close()
+
+    async def _recover(self) -> None:
+        # Albums left behind by a process that stopped before flushing them.
+        while True:
+            try:
+                groups = await asyncio.to_thread(self._store.groups)
+            except Exception as exc:
+                logger.warning("Cannot read pending albums: %s", exc)
+                groups = []
+            for group_id in groups:
+                if group_id not in self._timers:
+                    self._arm(group_id, self._window)
+            await asyncio.sleep(self._recovery_interval)
+
+    async def add(self, message: Message, user: str) -> None:
+        group_id = message.media_group_id
+        await asyncio.to_thread(self._store.add, group_id, message.chat_id, user, message.message_id)
+        self._arm(group_id, self._window)
+
+    def _arm(self, group_id: str, delay: float) -> None:
+        if self._stopping:
+            return
+        timer = self._timers.get(group_id)
+        if timer is not None:
+            timer.cancel()
+        self._timers[group_id] = asyncio.get_running_loop().call_later(delay, self._schedule_flush, group_id)
+
+    def _schedule_flush(self, group_id: str) -> None:
+        # The store is only touched from the task, never from the timer callback on the loop.
+        self._timers.pop(group_id, None)
+        task = asyncio.create_task(self._flush_when_quiet(group_id))
+        self._flushing.append(task)
+        task.add_done_callback(self._flushing.remove)
+
+    async def _flush_when_quiet(self, group_id: str) -> None:
+        try:
+            # Another process may have received a later item of the same album.
+            last_added = await asyncio.to_thread(self._store.last_added, group_id)
+            if last_added is None:
+                return
+            remaining = last_added + self._window - time.time()
+            if remaining > 0:
+                self._arm(group_id, remaining)
+                return
+
+            album = await asyncio.to_thread(self._store.claim, group_id)
+        except Exception as exc:
+            # Left in the store; the recovery loop tries again.
+            logger.warning("Cannot claim album %s: %s", group_id, exc)
+            return
+
+        if album is not None:
+            await self._flush(*album)
+
+    async def _flush(self, chat_id: int, user: str, message_ids: List[int]) -> None:
+        count = len(message_ids)
+
+        if config.ADMIN_CHAT_ID:
+            try:
+                await self._bot.forward_messages(
+                    chat_id=config.ADMIN_CHAT_ID,
+                    from_chat_id=chat_id,
+                    message_ids=message_ids,
+                )
+                await self._bot.send_message(chat_id=config.ADMIN_CHAT_ID, text=f"{user}: {count}")
+            except Exception as exc:  # pragma: no cover - defensive admin forwarding
+                logger.exception("Failed to forward album to admin: %s", exc)
+
+        try:
+            await self._bot.send_message(
+                chat_id=chat_id,
+                text=f"Album with {count} files added to {user} portfolio",
+                reply_parameters=ReplyParameters(message_ids[0], allow_sending_without_reply=True),
+            )
+        except Exception as exc:  # pragma: no cover - best-effort acknowledgement
+            logger.exception("Failed to acknowledge album: %s", exc)
+
+
+album_batcher = AlbumBatcher(
+    AlbumStore(Path(config.DATA_DIR) / "albums.sqlite3"),
+    window=config.ALBUM_WINDOW,
+    recovery_interval=config.ALBUM_RECOVERY_INTERVAL,
+)
@@ -0,0 +1,102 @@
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+CHUNK_SIZE = 1024 * 1024
+
+# JPEG and MP4 are already compressed, deflating them only burns CPU.
+STORED_SUFFIXES = {".jpg", ".jpeg", ".png", ".mp4", ".mov", ".webm", ".zip"}
+
+
+class _ChunkSink:
+    """Write-only file object that hands out whatever was written so far."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+            self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def compression_for(path: Path) -> int:
+    return zipfile.ZIP_STORED if path.suffix.lower() in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+
+
+def iter_media_files(media_dir: Path) -> List[Path]:
+    # Hidden top-level folders hold blobs and partial downloads, not user files.
+    return sorted(
+        p for p in media_dir.rglob("*")
+        if p.is_file() and not p.relative_to(media_dir).parts[0].startswith(".")
+    )
+
+
+def _write_entries(archive: zipfile.ZipFile, entries: Iterable[Tuple[Path, str]]) -> Iterator[None]:
+    # Yields after every chunk so the caller can flush or stop in between.
+    for path, arcname in entries:
+        try:
+            source = path.open("rb")
+        except FileNotFoundError:
+            continue
+
+        with source:
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            info.compress_type = compression_for(path)
+            with archive.open(info, "w", force_zip64=True) as target:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    yield
+        yield
+
+
+def stream_zip(
+    entries: Iterable[Tuple[Path, str]],
+    extra: Optional[Dict[str, bytes]] = None,
+) -> Iterator[bytes]:
+    """Yield a ZIP archive of ``(path, arcname)`` entries chunk by chunk.
+
+    Only one read buffer is held in memory at a time. The generator is
+    synchronous so Starlette iterates it in a worker thread. Small in-memory
+    members from ``extra`` are appended after the files.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", allowZip64=True) as archive:
+        for _ in _write_entries(archive, entries):
+            data = sink.drain()
+            if data:
+                yield data
+
+        for arcname, payload in (extra or {}).items():
+            archive.writestr(arcname, payload, compress_type=zipfile.ZIP_DEFLATED)
+
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def build_zip(entries: Iterable[Tuple[Path, str]], target: Path) -> Iterator[None]:
+    """Write a ZIP archive of ``(path, arcname)`` entries to ``target``.
+
+    Yields after every chunk, so a caller can abort a long build between
+    chunks; ``target`` is left incomplete in that case.
+    """
+    with zipfile.ZipFile(target, "w", allowZip64=True) as archive:
+        yield from _write_entries(archive, entries)
@@ -0,0 +1,203 @@
+import hashlib
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import config
+from core.utils.sqlite import SQLiteStore
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    received_at REAL NOT NULL
+)
+"""
+
+_COLUMNS = {
+    "file_id": "TEXT",
+    "file_unique_id": "TEXT",
+    "chat_id": "INTEGER",
+    "user_id": "INTEGER",
+    "message_id": "INTEGER",
+    "exported_at": "REAL",
+}
+
+_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS media_file_unique_id ON media (file_unique_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS media_user_file ON media (user, file_unique_id)",
+    "CREATE INDEX IF NOT EXISTS media_user ON media (user, id)",
+    "CREATE INDEX IF NOT EXISTS media_kind ON media (kind, id)",
+    "CREATE INDEX IF NOT EXISTS media_sha256 ON media (sha256)",
+    "CREATE INDEX IF NOT EXISTS media_exported ON media (exported_at, id)",
+    "CREATE INDEX IF NOT EXISTS media_path ON media (path)",
+)
+
+_FIELDS = (
+    "id, user, kind, path, size, sha256, received_at, file_id, file_unique_id, chat_id, user_id, message_id,"
+    " exported_at"
+)
+
+
+@dataclass
+class MediaEntry:
+    id: int
+    user: str
+    kind: str
+    path: str
+    size: int
+    sha256: str
+    received_at: float
+    file_id: Optional[str] = None
+    file_unique_id: Optional[str] = None
+    chat_id: Optional[int] = None
+    user_id: Optional[int] = None
+    message_id: Optional[int] = None
+    exported_at: Optional[float] = None
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as source:
+        for chunk in iter(lambda: source.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaCatalog(SQLiteStore):
+    _schema = (_SCHEMA,)
+    _columns = {"media": _COLUMNS}
+    _indexes = _INDEXES
+
+    def add(self, user: str, kind: str, path: str, size: int, sha256: str,
+            received_at: Optional[float] = None, file_id: Optional[str] = None,
+            file_unique_id: Optional[str] = None, chat_id: Optional[int] = None,
+            user_id: Optional[int] = None, message_id: Optional[int] = None) -> int:
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO media"
+                " (user, kind, path, size, sha256, received_at, file_id, file_unique_id, chat_id, user_id, message_id)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (user, kind, path, size, sha256, received_at or time.time(), file_id, file_unique_id,
+                 chat_id, user_id, message_id),
+            )
+            conn.commit()
+            if cursor.rowcount:
+                return cursor.lastrowid
+            row = conn.execute(
+                "SELECT id FROM media WHERE user = ? AND file_unique_id = ?", (user, file_unique_id)
+            ).fetchone()
+            return row["id"]
+
+    def find_by_unique_id(self, file_unique_id: str, user: Optional[str] = None) -> Optional[MediaEntry]:
+        query = f"SELECT {_FIELDS} FROM media WHERE file_unique_id = ?"
+        params: tuple = (file_unique_id,)
+        if user is not None:
+            query += " AND user = ?"
+            params += (user,)
+        with self._lock:
+            row = self._connection().execute(query + " ORDER BY id LIMIT 1", params).fetchone()
+        return MediaEntry(**dict(row)) if row else None
+
+    def get(self, entry_id: int) -> Optional[MediaEntry]:
+        with self._lock:
+            row = self._connection().execute(f"SELECT {_FIELDS} FROM media WHERE id = ?", (entry_id,)).fetchone()
+        return MediaEntry(**dict(row)) if row else None
+
+    def page(self, after: int = 0, limit: int = 100, user: Optional[str] = None,
+             kind: Optional[str] = None) -> List[MediaEntry]:
+        query = f"SELECT {_FIELDS} FROM media WHERE id > ?"
+        params: tuple = (after,)
+        if user is not None:
+            query += " AND user = ?"
+            params += (user,)
+        if kind is not None:
+            query += " AND kind = ?"
+            params += (kind,)
+        with self._lock:
+            rows = self._connection().execute(query + " ORDER BY id LIMIT ?", params + (limit,)).fetchall()
+        return [MediaEntry(**dict(row)) for row in rows]
+
+    def iter_all(self, batch: int = 1000) -> Iterator[MediaEntry]:
+        after = 0
+        while True:
+            entries = self.page(after, batch)
+            if not entries:
+                return
+            yield from entries
+            after = entries[-1].id
+
+    def users(self, after: str = "", limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT user, COUNT(*) AS files, SUM(size) AS bytes,"
+                " SUM(kind = 'photos') AS photos, SUM(kind = 'videos') AS videos,"
+                " MIN(received_at) AS first_received_at, MAX(received_at) AS last_received_at"
+                " FROM media WHERE user > ? GROUP BY user ORDER BY user LIMIT ?",
+                (after, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._connection().execute("SELECT 1 FROM media LIMIT 1").fetchone() is None
+
+    def mark_exported(self, entry_ids: List[int]) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "UPDATE media SET exported_at = ? WHERE id = ? AND exported_at IS NULL",
+                [(now, entry_id) for entry_id in entry_ids],
+            )
+            conn.commit()
+
+    def exported(self, before: float, limit: int = 1000) -> List[MediaEntry]:
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT {_FIELDS} FROM media WHERE exported_at <= ? ORDER BY exported_at, id LIMIT ?",
+                (before, limit),
+            ).fetchall()
+        return [MediaEntry(**dict(row)) for row in rows]
+
+    def oldest(self, limit: int = 100) -> List[MediaEntry]:
+        """Eviction order: exported files first, then everything else, oldest first."""
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT {_FIELDS} FROM media ORDER BY exported_at IS NULL, id LIMIT ?", (limit,)
+            ).fetchall()
+        return [MediaEntry(**dict(row)) for row in rows]
+
+    def stored_bytes(self) -> int:
+        """Disk used by the store; files shared by several users count once."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT COALESCE(SUM(size), 0) AS size FROM (SELECT MAX(size) AS size FROM media GROUP BY sha256)"
+            ).fetchone()
+        return row["size"]
+
+    def has_sha256(self, sha256: str) -> bool:
+        with self._lock:
+            row = self._connection().execute("SELECT 1 FROM media WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone()
+        return row is not None
+
+    def has_path(self, path: str) -> bool:
+        with self._lock:
+            row = self._connection().execute("SELECT 1 FROM media WHERE path = ? LIMIT 1", (path,)).fetchone()
+        return row is not None
+
+    def delete(self, entry_ids: List[int]) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.executemany("DELETE FROM media WHERE id = ?", [(entry_id,) for entry_id in entry_ids])
+            conn.commit()
+
+
+catalog = MediaCatalog(Path(config.DATA_DIR) / "media.sqlite3")
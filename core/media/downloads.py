@@ -0,0 +1,340 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from telegram import Bot, ReplyParameters
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+import config
+from core.media.store import MediaStore, StoredMedia, media_store
+from core.utils.admin_notify import admin_notifier
+from core.utils.metrics import DOWNLOADS, DOWNLOADS_IN_FLIGHT
+from core.utils.sqlite import SQLiteStore
+from core.utils.workers import worker_registry
+
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+KIND_LABELS = {"photos": "фото", "videos": "видео"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS download_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    user TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    suffix TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    file_unique_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    forwarded INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+_COLUMNS = {
+    "media_group_id": "TEXT",
+    "owner": "TEXT",
+    "user_id": "INTEGER",
+}
+
+_FIELDS = (
+    "id, chat_id, message_id, user, kind, suffix, file_id, file_unique_id, attempts, forwarded, media_group_id,"
+    " user_id"
+)
+
+
+@dataclass
+class DownloadJob:
+    chat_id: int
+    message_id: int
+    user: str
+    kind: str
+    suffix: str
+    file_id: str
+    file_unique_id: str
+    attempts: int = 0
+    forwarded: bool = False
+    media_group_id: Optional[str] = None
+    user_id: Optional[int] = None
+    id: Optional[int] = None
+
+
+class DownloadJobStore(SQLiteStore):
+    _schema = (_SCHEMA,)
+    _columns = {"download_jobs": _COLUMNS}
+
+    def add(self, job: DownloadJob, owner: str) -> int:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "INSERT INTO download_jobs"
+                " (chat_id, message_id, user, kind, suffix, file_id, file_unique_id, forwarded, media_group_id,"
+                " user_id, owner, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.chat_id, job.message_id, job.user, job.kind, job.suffix, job.file_id, job.file_unique_id,
+                 int(job.forwarded), job.media_group_id, job.user_id, owner, now, now),
+            )
+            conn.commit()
+            return cursor.lastrowid
+
+    def claim_orphans(self, owner: str, is_alive: Callable[[str], bool]) -> List[DownloadJob]:
+        """Take over pending jobs of processes that are gone or released them, and return those jobs."""
+        with self._lock:
+            conn = self._connection()
+            owners = [
+                row["owner"]
+                for row in conn.execute(
+                    "SELECT DISTINCT owner FROM download_jobs WHERE status = ? AND owner IS NOT ?", (PENDING, owner)
+                )
+            ]
+
+        rows = []
+        for previous in owners:
+            if previous is not None and is_alive(previous):
+                continue
+            with self._lock:
+                conn = self._connection()
+                # Compare-and-set on the owner: only one process wins each job.
+                rows += conn.execute(
+                    f"UPDATE download_jobs SET owner = ? WHERE status = ? AND owner IS ? RETURNING {_FIELDS}",
+                    (owner, PENDING, previous),
+                ).fetchall()
+                conn.commit()
+        return sorted((DownloadJob(**dict(row)) for row in rows), key=lambda job: job.id)
+
+    def release(self, owner: str) -> int:
+        """Give up the pending jobs of ``owner`` so a live process can claim them right away."""
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "UPDATE download_jobs SET owner = NULL WHERE status = ? AND owner = ?", (PENDING, owner)
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def update(self, job: DownloadJob, status: str = PENDING, error: Optional[str] = None) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "UPDATE download_jobs SET status = ?, attempts = ?, forwarded = ?, last_error = ?, updated_at = ?"
+                " WHERE id = ?",
+                (status, job.attempts, int(job.forwarded), error, time.time(), job.id),
+            )
+            conn.commit()
+
+
+class DownloadPipeline:
+    """Persistent background queue of media downloads.
+
+    Handlers only enqueue a job; a fixed number of workers forward the
+    message to the admin, download it into the media store and report the
+    outcome. Jobs survive restarts and are retried with exponential backoff on
+    transient Bot API errors. Every ``reclaim_interval`` seconds the pipeline
+    takes over jobs left behind by stopped processes.
+    """
+
+    def __init__(
+        self,
+        store: MediaStore,
+        jobs: DownloadJobStore,
+        workers: int,
+        max_attempts: int,
+        retry_delay: float,
+        reclaim_interval: float,
+    ) -> None:
+        self._store = store
+        self._jobs = jobs
+        self._workers = max(1, workers)
+        self._max_attempts = max(1, max_attempts)
+        self._retry_delay = retry_delay
+        self._reclaim_interval = reclaim_interval
+        self._queue: "asyncio.Queue[DownloadJob]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._bot: Optional[Bot] = None
+        self._running = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._draining = asyncio.Event()
+
+    async def start(self, bot: Bot) -> None:
+        if self._tasks:
+            return
+        self._bot = bot
+        self._draining.clear()
+        await self._reclaim()
+
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"download-worker-{i}")
+            for i in range(self._workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._reclaim_periodically(), name="download-reclaim"))
+
+    async def stop(self, timeout: float) -> None:
+        """Let running jobs finish for up to ``timeout`` seconds; the rest stay pending for another process."""
+        self._draining.set()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Download pipeline stopped with %s jobs still running", self._running)
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = asyncio.Queue()
+        released = await asyncio.to_thread(self._jobs.release, worker_registry.token)
+        if released:
+            logger.info("Released %s pending download jobs", released)
+        self._jobs.close()
+
+    async def _reclaim(self) -> None:
+        recovered = await asyncio.to_thread(self._jobs.claim_orphans, worker_registry.token, worker_registry.is_alive)
+        for job in recovered:
+            self._queue.put_nowait(job)
+        if recovered:
+            logger.info("Recovered %s pending download jobs", len(recovered))
+
+    async def _reclaim_periodically(self) -> None:
+        # Picks up jobs released by an instance that stopped after this one started.
+        while True:
+            await asyncio.sleep(self._reclaim_interval)
+            try:
+                await self._reclaim()
+            except Exception as exc:
+                logger.warning("Cannot reclaim download jobs: %s", exc)
+
+    async def enqueue(self, job: DownloadJob) -> None:
+        job.id = await asyncio.to_thread(self._jobs.add, job, worker_registry.token)
+        self._queue.put_nowait(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if self._draining.is_set():
+                # Still pending in the job store, released on stop.
+                self._queue.task_done()
+                continue
+            self._running += 1
+            self._idle.clear()
+            DOWNLOADS_IN_FLIGHT.inc()
+            try:
+                await self._run(job)
+            except Exception:
+                logger.exception("Download job %s crashed", job.id)
+            finally:
+                DOWNLOADS_IN_FLIGHT.dec()
+                self._queue.task_done()
+                self._running -= 1
+                if not self._running:
+                    self._idle.set()
+
+    async def _run(self, job: DownloadJob) -> None:
+        while True:
+            job.attempts += 1
+            try:
+                if not job.forwarded:
+                    await self._forward_to_admin(job)
+                stored = await self._store.save(
+                    self._bot, job.file_id, job.file_unique_id, job.user, job.kind, job.suffix,
+                    chat_id=job.chat_id, user_id=job.user_id, message_id=job.message_id,
+                )
+            except RetryAfter as exc:
+                delay = float(exc.retry_after)
+                error: Exception = exc
+            except BadRequest as exc:
+                DOWNLOADS.inc(job.kind, FAILED)
+                await asyncio.to_thread(self._jobs.update, job, FAILED, repr(exc))
+                await self._report_failure(job, exc)
+                return
+            except (TimedOut, NetworkError) as exc:
+                delay = self._retry_delay * 2 ** (job.attempts - 1) * random.uniform(1, 1.5)
+                error = exc
+            except Exception as exc:
+                DOWNLOADS.inc(job.kind, FAILED)
+                await asyncio.to_thread(self._jobs.update, job, FAILED, repr(exc))
+                await self._report_failure(job, exc)
+                return
+            else:
+                DOWNLOADS.inc(job.kind, DONE)
+                await asyncio.to_thread(self._jobs.update, job, DONE)
+                await self._report_success(job, stored)
+                return
+
+            if job.attempts >= self._max_attempts:
+                DOWNLOADS.inc(job.kind, FAILED)
+                await asyncio.to_thread(self._jobs.update, job, FAILED, repr(error))
+                await self._report_failure(job, error)
+                return
+
+            await asyncio.to_thread(self._jobs.update, job, PENDING, repr(error))
+            if self._draining.is_set():
+                return
+            logger.warning("Download job %s failed (%s), retrying in %.1fs", job.id, error, delay)
+            try:
+                await asyncio.wait_for(self._draining.wait(), delay)
+            except asyncio.TimeoutError:
+                continue
+            # Shutting down: the retry is left to the next process.
+            return
+
+    async def _forward_to_admin(self, job: DownloadJob) -> None:
+        if config.ADMIN_CHAT_ID:
+            try:
+                forwarded_message = await self._bot.forward_message(
+                    chat_id=config.ADMIN_CHAT_ID,
+                    from_chat_id=job.chat_id,
+                    message_id=job.message_id,
+                )
+                logger.info("Forwarded message to admin: %s", forwarded_message)
+            except (BadRequest, Forbidden) as exc:
+                # Not retryable; the download itself must still happen.
+                logger.exception("Failed to forward media to admin: %s", exc)
+        job.forwarded = True
+        await asyncio.to_thread(self._jobs.update, job)
+
+    async def _report_success(self, job: DownloadJob, stored: StoredMedia) -> None:
+        logger.info("Stored %s %s (downloaded=%s)", job.kind, stored.entry.path, stored.downloaded)
+        # Albums are announced to the admin once by the album batcher.
+        if config.ADMIN_CHAT_ID and job.kind == "photos" and not job.media_group_id:
+            try:
+                await self._bot.send_message(chat_id=config.ADMIN_CHAT_ID, text=job.user)
+            except Exception:  # pragma: no cover - best-effort notification
+                logger.debug("Admin notification failed for download job %s", job.id)
+
+    async def _report_failure(self, job: DownloadJob, exc: Exception) -> None:
+        logger.error("Download job %s failed after %s attempts: %s", job.id, job.attempts, exc)
+        label = KIND_LABELS.get(job.kind, job.kind)
+        admin_notifier.report(f"{job.kind} download", exc)
+
+        try:
+            await self._bot.send_message(
+                chat_id=job.chat_id,
+                text=f"Произошла ошибка при обработке {label}. Попробуйте позже.",
+                reply_parameters=ReplyParameters(job.message_id, allow_sending_without_reply=True),
+            )
+        except Exception:  # pragma: no cover - best-effort notification
+            logger.debug("User notification failed for download job %s", job.id)
+
+
+download_pipeline = DownloadPipeline(
+    media_store,
+    DownloadJobStore(Path(config.DATA_DIR) / "downloads.sqlite3"),
+    workers=config.DOWNLOAD_WORKERS,
+    max_attempts=config.DOWNLOAD_MAX_ATTEMPTS,
+    retry_delay=config.DOWNLOAD_RETRY_DELAY,
+    reclaim_interval=config.DOWNLOAD_RECLAIM_INTERVAL,
+)
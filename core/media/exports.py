@@ -0,0 +1,245 @@
+import logging
+import os
+import re
+import secrets
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import orjson
+
+import config
+from core.media.archive import build_zip
+from core.media.catalog import MediaCatalog, MediaEntry, catalog
+from core.utils.metrics import EXPORT_BYTES, EXPORT_LATENCY, EXPORT_THROUGHPUT
+from core.utils.workers import worker_registry
+
+
+logger = logging.getLogger(__name__)
+
+EXPORT_ID = re.compile(r"^\d{14}-[0-9a-f]{8}$")
+PART_NAME = re.compile(r"^part-\d{4}\.zip$")
+
+MANIFEST = "export.json"
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class MediaExporter:
+    """Builds full media exports as size-capped ZIP parts in a thread pool.
+
+    Entries are grouped per user or in catalog order and cut into parts of
+    at most ``part_size`` source bytes, and into at least one part per
+    worker thread, since a part is built by a single thread. Parts are built
+    concurrently, the largest first, into ``<export_dir>/<id>/`` and described by a manifest
+    there, so any worker process can report progress and serve finished
+    parts while the rest are still being built. Copying and compression
+    release the GIL, so threads are enough to keep several cores busy.
+    """
+
+    def __init__(self, media_dir: Path, export_dir: Path, media_catalog: MediaCatalog,
+                 workers: int, ttl: float) -> None:
+        self._media_dir = media_dir
+        self._dir = export_dir
+        self._catalog = media_catalog
+        self._workers = max(1, workers)
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._cancelled: Set[str] = set()
+        self._closed = False
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="media-export")
+        return self._executor
+
+    def _export_dir(self, export_id: str) -> Optional[Path]:
+        return self._dir / export_id if EXPORT_ID.match(export_id) else None
+
+    def _plan(self, by_user: bool, part_size: int) -> List[List[MediaEntry]]:
+        groups: Dict[str, List[MediaEntry]] = {}
+        for entry in self._catalog.iter_all():
+            if (self._media_dir / entry.path).is_file():
+                groups.setdefault(entry.user if by_user else "", []).append(entry)
+
+        if part_size:
+            # E.g. an export under the default 2 GB cap would otherwise be one part on one thread.
+            total = sum(entry.size for entries in groups.values() for entry in entries)
+            part_size = min(part_size, -(-total // self._workers))
+
+        parts: List[List[MediaEntry]] = []
+        for entries in groups.values():
+            current: List[MediaEntry] = []
+            current_size = 0
+            for entry in entries:
+                if current and part_size and current_size + entry.size > part_size:
+                    parts.append(current)
+                    current, current_size = [], 0
+                current.append(entry)
+                current_size += entry.size
+            if current:
+                parts.append(current)
+        return parts
+
+    def create(self, by_user: bool, part_size: int) -> Optional[Dict[str, Any]]:
+        """Plan an export and start building its parts; ``None`` if there is nothing to export."""
+        self.purge()
+        plan = self._plan(by_user, part_size)
+        if not plan:
+            return None
+
+        export_id = f"{datetime.now(timezone.utc):%Y%m%d%H%M%S}-{secrets.token_hex(4)}"
+        export_dir = self._dir / export_id
+        export_dir.mkdir(parents=True)
+
+        manifest = {
+            "id": export_id,
+            "created_at": time.time(),
+            "split": "user" if by_user else "size",
+            "worker": worker_registry.token,
+            "status": "building",
+            "parts": [
+                {
+                    "name": f"part-{index:04d}.zip",
+                    "user": entries[0].user if by_user else None,
+                    "files": len(entries),
+                    "source_bytes": sum(entry.size for entry in entries),
+                    "status": "pending",
+                    "size": None,
+                    "entry_ids": [entry.id for entry in entries],
+                }
+                for index, entries in enumerate(plan, 1)
+            ],
+        }
+        self._write_manifest(export_dir, manifest)
+
+        started = time.perf_counter()
+        executor = self._get_executor()
+        # Largest parts first keeps the pool busy until the end.
+        for index in sorted(range(len(plan)), key=lambda i: -manifest["parts"][i]["source_bytes"]):
+            entries = [(self._media_dir / entry.path, entry.path) for entry in plan[index]]
+            executor.submit(self._build_part, export_dir, manifest, index, entries, started)
+        return manifest
+
+    def _build_part(self, export_dir: Path, manifest: Dict[str, Any], index: int, entries: list,
+                    started: float) -> None:
+        part = manifest["parts"][index]
+        self._set_part(export_dir, manifest, index, status="building")
+        target = export_dir / part["name"]
+        tmp_path = target.with_suffix(".part")
+        try:
+            for _ in build_zip(entries, tmp_path):
+                if self._closed or manifest["id"] in self._cancelled:
+                    raise ExportCancelled
+            os.replace(tmp_path, target)
+        except ExportCancelled:
+            tmp_path.unlink(missing_ok=True)
+            return
+        except Exception as exc:
+            logger.warning("Cannot build %s of export %s: %s", part["name"], manifest["id"], exc)
+            tmp_path.unlink(missing_ok=True)
+            self._set_part(export_dir, manifest, index, status="failed", started=started)
+            return
+
+        size = target.stat().st_size
+        EXPORT_BYTES.inc("parts", amount=size)
+        self._set_part(export_dir, manifest, index, status="ready", size=size, started=started)
+
+    def _set_part(self, export_dir: Path, manifest: Dict[str, Any], index: int,
+                  started: Optional[float] = None, **fields: Any) -> None:
+        with self._lock:
+            if manifest["id"] in self._cancelled or not export_dir.is_dir():
+                return
+            manifest["parts"][index].update(fields)
+            statuses = {part["status"] for part in manifest["parts"]}
+            if not statuses & {"pending", "building"}:
+                manifest["status"] = "failed" if "failed" in statuses else "ready"
+                manifest["built_in"] = time.perf_counter() - started
+                EXPORT_LATENCY.observe(manifest["built_in"], "parts")
+                total = sum(part["size"] or 0 for part in manifest["parts"])
+                if manifest["built_in"] > 0:
+                    EXPORT_THROUGHPUT.observe(total / manifest["built_in"])
+                logger.info("Export %s %s in %.1fs", manifest["id"], manifest["status"], manifest["built_in"])
+            self._write_manifest(export_dir, manifest)
+
+    @staticmethod
+    def _write_manifest(export_dir: Path, manifest: Dict[str, Any]) -> None:
+        path = export_dir / MANIFEST
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(orjson.dumps(manifest))
+        os.replace(tmp_path, path)
+
+    def status(self, export_id: str) -> Optional[Dict[str, Any]]:
+        export_dir = self._export_dir(export_id)
+        if export_dir is None:
+            return None
+        try:
+            manifest = orjson.loads((export_dir / MANIFEST).read_bytes())
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if manifest["status"] == "building" and not worker_registry.is_alive(manifest["worker"]):
+            # The building process died; its unfinished parts will never appear.
+            manifest["status"] = "failed"
+            for part in manifest["parts"]:
+                if part["status"] in ("pending", "building"):
+                    part["status"] = "failed"
+        return manifest
+
+    def part_path(self, export_id: str, name: str) -> Optional[Path]:
+        export_dir = self._export_dir(export_id)
+        if export_dir is None or not PART_NAME.match(name):
+            return None
+        path = export_dir / name
+        return path if path.is_file() else None
+
+    def complete(self, export_id: str) -> Optional[List[int]]:
+        """Drop a fully built export; returns the catalog ids it contained."""
+        manifest = self.status(export_id)
+        if manifest is None or manifest["status"] != "ready":
+            return None
+        self.discard(export_id)
+        return [entry_id for part in manifest["parts"] for entry_id in part["entry_ids"]]
+
+    def discard(self, export_id: str) -> bool:
+        export_dir = self._export_dir(export_id)
+        if export_dir is None or not export_dir.is_dir():
+            return False
+        with self._lock:
+            self._cancelled.add(export_id)
+        shutil.rmtree(export_dir, ignore_errors=True)
+        return True
+
+    def purge(self) -> None:
+        """Remove exports older than the TTL, finished or not."""
+        if not self._dir.is_dir():
+            return
+        cutoff = time.time() - self._ttl
+        for export_dir in self._dir.iterdir():
+            try:
+                if export_dir.stat().st_mtime < cutoff:
+                    self.discard(export_dir.name)
+            except FileNotFoundError:
+                continue
+
+    def shutdown(self) -> None:
+        self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+media_exporter = MediaExporter(
+    Path(config.MEDIA_DIR),
+    Path(config.DATA_DIR) / "exports",
+    catalog,
+    workers=config.EXPORT_WORKERS,
+    ttl=config.EXPORT_TTL,
+)
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+import config
+from core.media.catalog import MediaEntry
+
+
+logger = logging.getLogger(__name__)
+
+
+def _save_thumbnail(image, target: Path, size: int) -> None:
+    image.thumbnail((size, size))
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    # Write next to the target and rename, so readers never see half a file.
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix=".part")
+    with os.fdopen(fd, "wb") as tmp:
+        image.save(tmp, "JPEG", quality=80, optimize=True)
+    os.replace(tmp_name, target)
+
+
+def render_photo(source: str, target: str, size: int) -> bool:
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        _save_thumbnail(ImageOps.exif_transpose(image), Path(target), size)
+    return True
+
+
+def render_video(source: str, target: str, size: int) -> bool:
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return False
+
+    from PIL import Image
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        frame = os.path.join(tmp_dir, "frame.jpg")
+        result = subprocess.run(
+            [ffmpeg, "-v", "error", "-ss", "1", "-i", source, "-frames:v", "1", "-y", frame],
+            capture_output=True,
+            timeout=60,
+        )
+        if result.returncode != 0 or not os.path.exists(frame):
+            # Clips shorter than a second: take the very first frame.
+            subprocess.run(
+                [ffmpeg, "-v", "error", "-i", source, "-frames:v", "1", "-y", frame],
+                capture_output=True,
+                timeout=60,
+            )
+        if not os.path.exists(frame):
+            return False
+
+        with Image.open(frame) as image:
+            _save_thumbnail(image, Path(target), size)
+    return True
+
+
+RENDERERS = {
+    "photos": render_photo,
+    "videos": render_video,
+}
+
+
+class PreviewRenderer:
+    """Thumbnails and video poster frames rendered in a process pool.
+
+    The CPU-bound work never runs on the event loop. Results are cached on
+    disk under the content hash, so a cached preview can never be stale.
+    Concurrent requests for the same preview share one render.
+    """
+
+    def __init__(self, media_dir: Path, cache_dir: Path, workers: int, size: int) -> None:
+        self._media_dir = media_dir
+        self._cache_dir = cache_dir
+        self._workers = max(1, workers)
+        self._size = size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, "asyncio.Future[bool]"] = {}
+
+    def cache_path(self, entry: MediaEntry) -> Path:
+        return self._cache_dir / entry.sha256[:2] / f"{entry.sha256}_{self._size}.jpg"
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # "spawn" keeps the workers free of the event loop and threads of this process.
+            self._executor = ProcessPoolExecutor(self._workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def thumbnail(self, entry: MediaEntry) -> Optional[Path]:
+        target = self.cache_path(entry)
+        if target.exists():
+            return target
+
+        renderer = RENDERERS.get(entry.kind)
+        source = self._media_dir / entry.path
+        if renderer is None or not source.exists():
+            return None
+
+        key = target.name
+        future = self._inflight.get(key)
+        if future is None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_executor(), renderer, str(source), str(target), self._size)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        try:
+            rendered = await asyncio.shield(future)
+        except Exception as exc:
+            logger.warning("Cannot render preview for %s: %s", entry.path, exc)
+            return None
+        return target if rendered else None
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+preview_renderer = PreviewRenderer(
+    Path(config.MEDIA_DIR),
+    Path(config.DATA_DIR) / "thumbnails",
+    workers=config.PREVIEW_WORKERS,
+    size=config.PREVIEW_SIZE,
+)
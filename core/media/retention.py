@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import config
+from core.media.catalog import MediaCatalog, MediaEntry, catalog
+from core.media.previews import PreviewRenderer, preview_renderer
+from core.media.store import TMP_DIR, MediaStore, media_store
+from core.utils.workers import worker_registry
+
+
+logger = logging.getLogger(__name__)
+
+
+class MediaRetention:
+    """Bounds the disk used by the media store.
+
+    Files are deleted for two reasons only: they were part of a finished
+    full export, or the store is over ``quota`` bytes. Eviction takes the
+    oldest exported files first and only then the oldest files that were
+    never exported. A blob is removed once no catalog entry refers to it.
+
+    Every worker runs the loop, but only the leader sweeps, so a worker
+    takes over once it wins leadership, e.g. after a rolling restart.
+    """
+
+    def __init__(
+        self,
+        store: MediaStore,
+        media_catalog: MediaCatalog,
+        previews: PreviewRenderer,
+        quota: int,
+        exported_ttl: float,
+        tmp_ttl: float,
+        interval: float,
+    ) -> None:
+        self._store = store
+        self._catalog = media_catalog
+        self._previews = previews
+        self._quota = quota
+        self._exported_ttl = exported_ttl
+        self._tmp_ttl = tmp_ttl
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._backfilled = False
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="media-retention")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self._tick)
+            except Exception as exc:
+                logger.exception("Media retention sweep failed: %s", exc)
+            await asyncio.sleep(self._interval)
+
+    def _tick(self) -> None:
+        if not worker_registry.is_leader:
+            return
+        if not self._backfilled:
+            self._backfilled = True
+            if self._catalog.is_empty():
+                # One-off import of files stored before the catalog existed.
+                self._store.backfill()
+        self.sweep()
+
+    def sweep(self) -> int:
+        """Apply the retention rules once; returns the number of deleted entries."""
+        if not self._lock.acquire(blocking=False):
+            return 0
+        try:
+            deleted = self._purge_exported()
+            deleted += self._enforce_quota()
+            self._purge_tmp()
+        finally:
+            self._lock.release()
+        if deleted:
+            logger.info("Media retention deleted %s files", deleted)
+        return deleted
+
+    def _purge_exported(self) -> int:
+        deleted = 0
+        before = time.time() - self._exported_ttl
+        while True:
+            entries = self._catalog.exported(before)
+            if not entries:
+                return deleted
+            self._delete(entries)
+            deleted += len(entries)
+
+    def _enforce_quota(self) -> int:
+        if self._quota <= 0:
+            return 0
+
+        deleted = 0
+        evicted_unexported = 0
+        usage = self._catalog.stored_bytes()
+        while usage > self._quota:
+            entries = self._catalog.oldest()
+            if not entries:
+                break
+            for entry in entries:
+                if usage <= self._quota:
+                    break
+                usage -= self._delete([entry])
+                deleted += 1
+                if entry.exported_at is None:
+                    evicted_unexported += 1
+
+        if evicted_unexported:
+            logger.warning("Media quota exceeded: evicted %s files that were never exported", evicted_unexported)
+        return deleted
+
+    def _delete(self, entries: List[MediaEntry]) -> int:
+        # Rows go first, so no export picks up a file that is about to vanish.
+        self._catalog.delete([entry.id for entry in entries])
+
+        freed = 0
+        for entry in entries:
+            # The same user file may back other rows: same content under another file_unique_id, or a backfilled row.
+            if not self._catalog.has_path(entry.path):
+                (self._store.root / entry.path).unlink(missing_ok=True)
+            if self._catalog.has_sha256(entry.sha256):
+                continue
+            self._store.blob_path(entry.sha256, Path(entry.path).suffix).unlink(missing_ok=True)
+            self._previews.cache_path(entry).unlink(missing_ok=True)
+            freed += entry.size
+        return freed
+
+    def _purge_tmp(self) -> None:
+        # Partial downloads of a process that died mid-transfer.
+        deadline = time.time() - self._tmp_ttl
+        tmp_dir = self._store.root / TMP_DIR
+        if not tmp_dir.is_dir():
+            return
+        for path in tmp_dir.iterdir():
+            try:
+                if path.stat().st_mtime < deadline:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+media_retention = MediaRetention(
+    media_store,
+    catalog,
+    preview_renderer,
+    quota=config.MEDIA_QUOTA_MB * 1024 * 1024,
+    exported_ttl=config.RETENTION_EXPORTED_TTL,
+    tmp_ttl=config.RETENTION_TMP_TTL,
+    interval=config.RETENTION_INTERVAL,
+)
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from telegram import Bot
+
+import config
+from core.media.archive import iter_media_files
+from core.media.catalog import MediaCatalog, MediaEntry, catalog, file_sha256
+from core.utils.http import file_client
+
+
+logger = logging.getLogger(__name__)
+
+BLOBS_DIR = ".blobs"
+TMP_DIR = ".tmp"
+
+
+@dataclass
+class StoredMedia:
+    entry: MediaEntry
+    downloaded: bool
+
+
+def _link(source: Path, target: Path) -> None:
+    if target.exists():
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        pass
+    except OSError:
+        # Filesystems without hardlink support get a plain copy.
+        shutil.copy2(source, target)
+
+
+class MediaStore:
+    """Content-addressed media storage.
+
+    Blobs live once under ``<root>/.blobs/<aa>/<sha256><suffix>``; every user
+    gets a hardlink to the blob in ``<root>/<user>/<kind>/``. Files Telegram
+    already delivered (same ``file_unique_id``) are never downloaded twice.
+    """
+
+    def __init__(self, root: Path, media_catalog: MediaCatalog) -> None:
+        self.root = root
+        self.catalog = media_catalog
+
+    def blob_path(self, sha256: str, suffix: str) -> Path:
+        return self.root / BLOBS_DIR / sha256[:2] / f"{sha256}{suffix}"
+
+    def user_path(self, user: str, kind: str, sha256: str, suffix: str) -> Path:
+        return self.root / user / kind / f"{sha256}{suffix}"
+
+    def _relative(self, path: Path) -> str:
+        return path.relative_to(self.root).as_posix()
+
+    async def save(
+        self,
+        bot: Bot,
+        file_id: str,
+        file_unique_id: str,
+        user: str,
+        kind: str,
+        suffix: str,
+        chat_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+    ) -> StoredMedia:
+        origin = {"chat_id": chat_id, "user_id": user_id, "message_id": message_id}
+        # Catalog calls commit and share a lock with the export threads: keep them off the loop.
+        known = await asyncio.to_thread(self._find_stored, file_unique_id, user)
+        if known is not None:
+            return StoredMedia(known, downloaded=False)
+
+        known = await asyncio.to_thread(self.catalog.find_by_unique_id, file_unique_id)
+        if known is not None:
+            blob = self.blob_path(known.sha256, suffix)
+            if blob.exists():
+                target = self.user_path(user, kind, known.sha256, suffix)
+                try:
+                    await asyncio.to_thread(_link, blob, target)
+                except FileNotFoundError:
+                    pass  # evicted meanwhile; download it again
+                else:
+                    entry = await asyncio.to_thread(
+                        self._add, user, kind, target, known.sha256, file_id, file_unique_id, **origin
+                    )
+                    return StoredMedia(entry, downloaded=False)
+
+        tmp_path = self.root / TMP_DIR / f"{uuid.uuid4().hex}.part"
+        tmp_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            file = await bot.get_file(file_id)
+            logger.info("FILE INFO: %s", file)
+            await file_client.fetch(file.file_path, tmp_path)
+            sha256 = await asyncio.to_thread(self._commit, tmp_path, suffix)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        target = self.user_path(user, kind, sha256, suffix)
+        await asyncio.to_thread(_link, self.blob_path(sha256, suffix), target)
+        entry = await asyncio.to_thread(self._add, user, kind, target, sha256, file_id, file_unique_id, **origin)
+        return StoredMedia(entry, downloaded=True)
+
+    def _find_stored(self, file_unique_id: str, user: str) -> Optional[MediaEntry]:
+        known = self.catalog.find_by_unique_id(file_unique_id, user)
+        if known is not None and (self.root / known.path).exists():
+            return known
+        return None
+
+    def _commit(self, tmp_path: Path, suffix: str) -> str:
+        sha256 = file_sha256(tmp_path)
+        blob = self.blob_path(sha256, suffix)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, blob)
+        return sha256
+
+    def _add(self, user: str, kind: str, target: Path, sha256: str, file_id: str,
+             file_unique_id: Optional[str], **origin: Optional[int]) -> MediaEntry:
+        entry_id = self.catalog.add(
+            user,
+            kind,
+            self._relative(target),
+            target.stat().st_size,
+            sha256,
+            file_id=file_id,
+            file_unique_id=file_unique_id,
+            **origin,
+        )
+        return self.catalog.get(entry_id)
+
+    def backfill(self) -> int:
+        """Catalog files stored before the catalog existed. Walks the tree once."""
+        count = 0
+        for path in iter_media_files(self.root):
+            parts = path.relative_to(self.root).parts
+            if len(parts) != 3:
+                continue
+            user, kind, _ = parts
+            stat = path.stat()
+            self.catalog.add(user, kind, self._relative(path), stat.st_size, file_sha256(path),
+                             received_at=stat.st_mtime)
+            count += 1
+        return count
+
+
+media_store = MediaStore(Path(config.MEDIA_DIR), catalog)
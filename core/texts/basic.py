@@ -106,3 +106,13 @@ CONFIDENTIALITY_POLICY = '''
 
 Дата вступления в силу: 24.11.2024
 '''
+
+MAKEUP_NO_VACANCIES = "В данный момент, к сожалению, нет открытых вакансий на позицию визажиста"
+
+STYLIST_NO_VACANCIES = "В данный момент, к сожалению, нет открытых вакансий на позицию стилиста"
+
+INBOUND_RATE_LIMITED = "Вы отправляете сообщения слишком часто. Пожалуйста, подождите немного и попробуйте снова."
+
+INBOUND_UPLOAD_LIMITED = (
+    "Вы отправили слишком много файлов за короткое время. Пожалуйста, отправьте оставшиеся файлы немного позже."
+)
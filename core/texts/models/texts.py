@@ -82,3 +82,13 @@ MODEL_EQUIPMENT = '''
 Наша цель — создать для вас максимально комфортные условия, чтобы вы могли полностью сосредоточиться на своем творчестве и профессиональном росте. Мы заботимся о каждом аспекте вашей работы и стремимся обеспечить вам все необходимое для достижения наилучших результатов.
 
 '''
+
+SURVEY_INTRO = '''
+Чтобы мы лучше узнали вас, ответьте, пожалуйста, на несколько вопросов. Отвечайте одним сообщением на каждый вопрос.
+
+Прервать анкету можно командой /cancel, начать заново — командой /survey.
+'''
+
+SURVEY_DONE = "Спасибо! Анкета отправлена. Не забудьте прислать портфолио, если ещё не сделали этого."
+
+SURVEY_CANCELLED = "Анкета прервана. Вернуться к ней можно командой /survey."
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from telegram import Bot
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+@dataclass
+class _Fingerprint:
+    count: int
+    sample: str
+
+
+class AdminNotifier:
+    """Rate-friendly error reporting to ``ADMIN_CHAT_ID``.
+
+    Errors are fingerprinted by exception type and origin. The first
+    occurrence within a window is sent right away, repeats are only counted
+    and rolled up into one digest message when the window closes. At most
+    ``max_fingerprints`` distinct errors are tracked per window.
+    """
+
+    def __init__(self, window: float, max_fingerprints: int) -> None:
+        self._window = window
+        self._max_fingerprints = max(1, max_fingerprints)
+        self._fingerprints: Dict[Tuple[str, str], _Fingerprint] = {}
+        self._fresh: List[str] = []
+        self._overflow = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._bot: Optional[Bot] = None
+
+    def start(self, bot: Bot) -> None:
+        if not config.ADMIN_CHAT_ID or self._task is not None:
+            return
+        self._bot = bot
+        self._task = asyncio.create_task(self._run(), name="admin-notifier")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self._flush(digest=True)
+
+    def report(self, where: str, exc: BaseException) -> None:
+        key = (where, type(exc).__name__)
+        fingerprint = self._fingerprints.get(key)
+        if fingerprint is not None:
+            fingerprint.count += 1
+            return
+
+        if len(self._fingerprints) >= self._max_fingerprints:
+            self._overflow += 1
+            return
+
+        sample = f"{type(exc).__name__} in {where}: {exc}"
+        self._fingerprints[key] = _Fingerprint(count=1, sample=sample)
+        self._fresh.append(sample)
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        window_end = time.monotonic() + self._window
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(0.0, window_end - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            digest = time.monotonic() >= window_end
+            await self._flush(digest)
+            if digest:
+                window_end = time.monotonic() + self._window
+
+    async def _flush(self, digest: bool) -> None:
+        lines = [f"Произошла ошибка: {sample}" for sample in self._fresh]
+        self._fresh.clear()
+
+        if digest:
+            window = int(self._window)
+            for (where, name), fingerprint in self._fingerprints.items():
+                if fingerprint.count > 1:
+                    lines.append(f"{fingerprint.count}× {name} in {where} in the last {window}s")
+            if self._overflow:
+                lines.append(f"{self._overflow} more errors of other kinds in the last {window}s")
+            self._fingerprints.clear()
+            self._overflow = 0
+
+        if not lines or self._bot is None:
+            return
+
+        text = "\n".join(lines)
+        if len(text) > MAX_MESSAGE_LENGTH:
+            text = text[: MAX_MESSAGE_LENGTH - 1] + "…"
+
+        try:
+            await self._bot.send_message(chat_id=config.ADMIN_CHAT_ID, text=text)
+        except Exception as exc:
+            logger.warning("Admin notification failed: %s", exc)
+
+
+admin_notifier = AdminNotifier(
+    window=config.ADMIN_DIGEST_WINDOW,
+    max_fingerprints=config.ADMIN_DIGEST_MAX_FINGERPRINTS,
+)
@@ -1,15 +1,56 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+
 from telegram import Bot, BotCommand
 
+import config
+
+
+logger = logging.getLogger(__name__)
+
+COMMANDS = [
+    BotCommand("start", "Запустить бота"),
+    BotCommand("help", "Как пользоваться ботом"),
+    BotCommand("model", "Варианты работы для моделей"),
+    BotCommand("survey", "Заполнить анкету"),
+    BotCommand("about_platform", "О нашей платформе"),
+    BotCommand("portfolio", "Требования к портфолио"),
+    BotCommand("next_steps", "Что произойдет после заявки"),
+    BotCommand("equipment", "Что входит в поддержку оборудованием"),
+    BotCommand("privacy_rules", "Правила Конфиденциальности"),
+]
+
+_STATE_PATH = Path(config.DATA_DIR) / "commands.sha256"
+
+
+def _commands_hash() -> str:
+    payload = json.dumps([command.to_dict() for command in COMMANDS], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
 
 async def set_commands(bot: Bot) -> None:
-    commands = [
-        BotCommand("start", "Запустить бота"),
-        BotCommand("help", "Как пользоваться ботом"),
-        BotCommand("model", "Варианты работы для моделей"),
-        BotCommand("about_platform", "О нашей платформе"),
-        BotCommand("portfolio", "Требования к портфолио"),
-        BotCommand("next_steps", "Что произойдет после заявки"),
-        BotCommand("equipment", "Что входит в поддержку оборудованием"),
-        BotCommand("privacy_rules", "Правила Конфиденциальности"),
-    ]
-    await bot.set_my_commands(commands)
+    await bot.set_my_commands(COMMANDS)
+
+
+async def sync_commands(bot: Bot) -> bool:
+    """Set the command list only if it changed; returns ``True`` if it was set."""
+    digest = _commands_hash()
+    try:
+        if _STATE_PATH.read_text().strip() == digest:
+            return False
+    except FileNotFoundError:
+        pass
+
+    # Unknown or changed hash: ask Telegram before writing.
+    if list(await bot.get_my_commands()) != COMMANDS:
+        await set_commands(bot)
+        logger.info("Bot commands updated")
+        changed = True
+    else:
+        changed = False
+
+    _STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    _STATE_PATH.write_text(digest)
+    return changed
@@ -0,0 +1,96 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import config
+from core.utils.sqlite import SQLiteStore
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_updates (
+    update_id INTEGER PRIMARY KEY,
+    seen_at REAL NOT NULL
+)
+"""
+
+# Telegram always serializes update_id first, so it can be read without
+# decoding the whole body.
+_UPDATE_ID = re.compile(rb'^\s*\{\s*"update_id"\s*:\s*(\d+)')
+
+_PRUNE_EVERY = 1000
+
+
+def peek_update_id(body: bytes) -> Optional[int]:
+    match = _UPDATE_ID.match(body[:64])
+    return int(match.group(1)) if match else None
+
+
+class UpdateDeduplicator(SQLiteStore):
+    """Drops webhook redeliveries by ``update_id``.
+
+    Recently seen ids are kept in a bounded LRU, checked by ``seen`` without
+    touching the disk. With a ``path``, ``claim`` also records them in
+    SQLite, in a thread, which makes the check survive restarts and work
+    across worker processes; rows older than ``ttl`` are pruned.
+    """
+
+    _schema = (_SCHEMA,)
+
+    def __init__(self, capacity: int, path: Optional[Path], ttl: float) -> None:
+        super().__init__(path)
+        self._capacity = max(1, capacity)
+        self._recent: "OrderedDict[int, None]" = OrderedDict()
+        self._ttl = ttl
+        self._inserts = 0
+
+    def seen(self, update_id: int) -> bool:
+        """Record ``update_id`` in this process and return ``True`` if it was already seen here."""
+        if update_id in self._recent:
+            self._recent.move_to_end(update_id)
+            return True
+
+        self._recent[update_id] = None
+        if len(self._recent) > self._capacity:
+            self._recent.popitem(last=False)
+        return False
+
+    async def claim(self, update_id: int) -> bool:
+        """Record ``update_id`` for all processes; ``False`` if another one or an earlier run had it."""
+        if self._path is None:
+            return True
+        return await asyncio.to_thread(self._persist, update_id)
+
+    async def forget(self, update_id: int) -> None:
+        """Allow a redelivery, e.g. when the update could not be accepted."""
+        self._recent.pop(update_id, None)
+        if self._path is not None:
+            await asyncio.to_thread(self._delete, update_id)
+
+    def _delete(self, update_id: int) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM seen_updates WHERE update_id = ?", (update_id,))
+            conn.commit()
+
+    def _persist(self, update_id: int) -> bool:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO seen_updates (update_id, seen_at) VALUES (?, ?)", (update_id, now)
+            ).rowcount
+            self._inserts += 1
+            if self._inserts % _PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM seen_updates WHERE seen_at < ?", (now - self._ttl,))
+            conn.commit()
+        return bool(inserted)
+
+
+update_deduplicator = UpdateDeduplicator(
+    capacity=config.UPDATE_DEDUP_SIZE,
+    path=Path(config.DATA_DIR) / "updates.sqlite3" if config.UPDATE_DEDUP_PERSIST else None,
+    ttl=config.UPDATE_DEDUP_TTL,
+)
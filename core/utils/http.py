@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import httpx
+from telegram.error import BadRequest, NetworkError, TimedOut
+from telegram.request import HTTPXRequest, RequestData
+
+import config
+from core.utils.metrics import API_ERRORS, API_LATENCY, DOWNLOAD_BYTES, DOWNLOAD_THROUGHPUT
+
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """``HTTPXRequest`` that records latency and errors per Bot API method."""
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData] = None,
+        read_timeout=HTTPXRequest.DEFAULT_NONE,
+        write_timeout=HTTPXRequest.DEFAULT_NONE,
+        connect_timeout=HTTPXRequest.DEFAULT_NONE,
+        pool_timeout=HTTPXRequest.DEFAULT_NONE,
+    ) -> Tuple[int, bytes]:
+        api_method = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        try:
+            code, payload = await super().do_request(
+                url, method, request_data, read_timeout, write_timeout, connect_timeout, pool_timeout
+            )
+        except Exception:
+            API_ERRORS.inc(api_method)
+            raise
+        finally:
+            API_LATENCY.observe(time.perf_counter() - started, api_method)
+        if code >= 400:
+            API_ERRORS.inc(api_method)
+        return code, payload
+
+
+def build_api_request() -> HTTPXRequest:
+    """Connection pool used for Bot API method calls only."""
+    return InstrumentedRequest(
+        connection_pool_size=config.BOT_API_POOL_SIZE,
+        connect_timeout=config.BOT_API_CONNECT_TIMEOUT,
+        read_timeout=config.BOT_API_READ_TIMEOUT,
+        write_timeout=config.BOT_API_WRITE_TIMEOUT,
+        pool_timeout=config.BOT_API_POOL_TIMEOUT,
+        http_version="2" if config.BOT_API_HTTP2 else "1.1",
+        httpx_kwargs={
+            "limits": httpx.Limits(
+                max_connections=config.BOT_API_POOL_SIZE,
+                max_keepalive_connections=config.BOT_API_POOL_SIZE,
+                keepalive_expiry=config.BOT_API_KEEPALIVE,
+            ),
+        },
+    )
+
+
+def local_file_path(file_path: str) -> Path:
+    """Where a file reported by a ``--local`` Bot API server is visible to this process."""
+    # PTB prefixes paths it cannot see itself with the file URL.
+    url_prefix = f"{config.BOT_API_FILE_URL}{config.TELEGRAM_API_KEY}/"
+    if file_path.startswith(url_prefix):
+        file_path = file_path[len(url_prefix):]
+    if config.BOT_API_LOCAL_ROOT and config.BOT_API_LOCAL_MOUNT and file_path.startswith(config.BOT_API_LOCAL_ROOT):
+        file_path = config.BOT_API_LOCAL_MOUNT + file_path[len(config.BOT_API_LOCAL_ROOT):]
+    return Path(file_path)
+
+
+def _hand_off(source: Path, target: Path) -> int:
+    size = source.stat().st_size
+    if config.BOT_API_LOCAL_MOVE:
+        shutil.move(source, target)
+        return size
+    try:
+        os.link(source, target)
+    except OSError:
+        # Different filesystem: copyfile still copies in the kernel (sendfile).
+        shutil.copyfile(source, target)
+    return size
+
+
+class FileTransferClient:
+    """Separate connection pool for file downloads.
+
+    Large transfers stream straight to disk and never compete with
+    ``sendMessage`` and friends for connections of the API pool.
+    """
+
+    def __init__(self) -> None:
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http1=not config.FILE_HTTP2,
+                http2=config.FILE_HTTP2,
+                limits=httpx.Limits(
+                    max_connections=config.FILE_POOL_SIZE,
+                    max_keepalive_connections=config.FILE_POOL_SIZE,
+                    keepalive_expiry=config.FILE_KEEPALIVE,
+                ),
+                timeout=httpx.Timeout(
+                    connect=config.FILE_CONNECT_TIMEOUT,
+                    read=config.FILE_READ_TIMEOUT,
+                    write=config.FILE_READ_TIMEOUT,
+                    pool=config.FILE_POOL_TIMEOUT,
+                ),
+            )
+        return self._client
+
+    async def fetch(self, file_path: str, path: Path) -> int:
+        """Store a file returned by ``getFile`` at ``path``.
+
+        In local mode the file is already on a shared volume and is linked
+        (or moved) into place; otherwise it is downloaded over HTTP.
+        """
+        if not config.BOT_API_LOCAL_MODE:
+            return await self.download(file_path, path)
+
+        source = local_file_path(file_path)
+        try:
+            size = await asyncio.to_thread(_hand_off, source, path)
+        except FileNotFoundError as exc:
+            raise BadRequest(f"File not found on the Bot API volume: {source}") from exc
+        DOWNLOAD_BYTES.inc(amount=size)
+        return size
+
+    async def download(self, url: str, path: Path) -> int:
+        # Errors are mapped to the telegram.error types used by the rest of the bot.
+        size = 0
+        started = time.perf_counter()
+        try:
+            async with self._get_client().stream("GET", url) as response:
+                if response.status_code >= 500 or response.status_code == 429:
+                    raise NetworkError(f"File download failed with HTTP {response.status_code}")
+                if response.status_code >= 400:
+                    raise BadRequest(f"File download failed with HTTP {response.status_code}")
+                with path.open("wb") as target:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        target.write(chunk)
+                        size += len(chunk)
+        except httpx.TimeoutException as exc:
+            raise TimedOut(f"File download timed out: {exc}") from exc
+        except httpx.HTTPError as exc:
+            raise NetworkError(f"File download failed: {exc}") from exc
+
+        elapsed = time.perf_counter() - started
+        DOWNLOAD_BYTES.inc(amount=size)
+        if elapsed > 0:
+            DOWNLOAD_THROUGHPUT.observe(size / elapsed)
+        return size
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+file_client = FileTransferClient()
@@ -0,0 +1,141 @@
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import config
+from core.texts import basic
+from core.utils.rate_limiter import TokenBucket
+
+
+RATE_LIMITED = "rate_limited"
+UPLOAD_BUDGET = "upload_budget"
+
+_MAX_USERS = 10_000
+
+
+@dataclass
+class _UserState:
+    bucket: Optional[TokenBucket]
+    window_started: float
+    uploaded: int = 0
+    notified: bool = False
+
+
+def _sender(data: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """User id and the chat to answer in, from a raw update."""
+    message = data.get("message")
+    if message is not None:
+        user = message.get("from")
+        return (user["id"], message["chat"]["id"]) if user else None
+
+    callback_query = data.get("callback_query")
+    if callback_query is not None:
+        user = callback_query["from"]
+        chat = (callback_query.get("message") or {}).get("chat") or {}
+        return user["id"], chat.get("id", user["id"])
+
+    return None
+
+
+def _upload_size(data: Dict[str, Any]) -> int:
+    message = data.get("message") or {}
+    if message.get("photo"):
+        return message["photo"][-1].get("file_size") or 0
+    if message.get("video"):
+        return message["video"].get("file_size") or 0
+    return 0
+
+
+class InboundLimiter:
+    """Per-user limits on incoming updates, checked on the raw webhook body.
+
+    Each user gets a token bucket for the update rate and a byte budget per
+    window, counted from the ``file_size`` Telegram reports for photos and
+    videos. Over-limit updates are dropped before they are queued, so they
+    never reach ``get_file``, the disk or the admin chat. The first drop in a
+    window comes with a short notice, returned as the webhook response;
+    dropped button presses are always answered with ``answerCallbackQuery``.
+    """
+
+    def __init__(self, rate: float, burst: int, upload_budget: int, window: float) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._upload_budget = upload_budget
+        self._window = window
+        self._users: "OrderedDict[int, _UserState]" = OrderedDict()
+        self._texts = {
+            RATE_LIMITED: basic.INBOUND_RATE_LIMITED,
+            UPLOAD_BUDGET: basic.INBOUND_UPLOAD_LIMITED,
+        }
+        self._notices = {reason: self._notice_prefix(text) for reason, text in self._texts.items()}
+
+    @staticmethod
+    def _notice_prefix(text: str) -> bytes:
+        return ('{"method":"sendMessage","text":' + json.dumps(text, ensure_ascii=False) + ',"chat_id":').encode()
+
+    @property
+    def enabled(self) -> bool:
+        return self._rate > 0 or self._upload_budget > 0
+
+    def _state(self, user_id: int, now: float) -> _UserState:
+        state = self._users.get(user_id)
+        if state is None:
+            if len(self._users) >= _MAX_USERS:
+                self._users.popitem(last=False)
+            bucket = TokenBucket(self._rate, self._burst) if self._rate > 0 else None
+            state = self._users[user_id] = _UserState(bucket, now)
+        else:
+            self._users.move_to_end(user_id)
+
+        if now - state.window_started >= self._window:
+            state.window_started = now
+            state.uploaded = 0
+            state.notified = False
+        return state
+
+    def check(self, data: Dict[str, Any]) -> Optional[Tuple[str, Optional[bytes]]]:
+        """``None`` if the update may pass, otherwise the reason and the notice to reply with, if any."""
+        sender = _sender(data)
+        if sender is None:
+            return None
+        user_id, chat_id = sender
+
+        now = time.monotonic()
+        state = self._state(user_id, now)
+        size = _upload_size(data)
+
+        if state.bucket is not None and state.bucket.delay(now) > 0:
+            reason = RATE_LIMITED
+        elif self._upload_budget and size and state.uploaded + size > self._upload_budget:
+            reason = UPLOAD_BUDGET
+        else:
+            if state.bucket is not None:
+                state.bucket.take(now)
+            state.uploaded += size
+            return None
+
+        notify = not state.notified
+        state.notified = True
+
+        callback_query = data.get("callback_query")
+        if callback_query is not None:
+            # Always answered, or the client keeps showing a spinner on the button.
+            answer = {"method": "answerCallbackQuery", "callback_query_id": callback_query["id"]}
+            if notify:
+                answer["text"] = self._texts[reason]
+            return reason, json.dumps(answer, ensure_ascii=False).encode()
+
+        if not notify:
+            return reason, None
+        return reason, self._notices[reason] + str(chat_id).encode() + b"}"
+
+
+# Every worker process gets its share of the per-user limits.
+inbound_limiter = InboundLimiter(
+    rate=config.INBOUND_USER_RATE / config.WEB_CONCURRENCY,
+    burst=config.INBOUND_USER_BURST,
+    upload_budget=config.INBOUND_UPLOAD_BUDGET_MB * 1024 * 1024 // config.WEB_CONCURRENCY,
+    window=config.INBOUND_UPLOAD_WINDOW,
+)
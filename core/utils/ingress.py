@@ -0,0 +1,34 @@
+from typing import Any, Dict
+
+from telegram import Update
+
+
+# Update types the registered handlers use; everything else is not even sent by Telegram.
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+
+# Message content some handler reacts to (see register_handlers in main.py).
+MESSAGE_CONTENT = ("photo", "video")
+CALLBACK_PREFIXES = ("model_order_",)
+
+
+def is_handled(data: Dict[str, Any]) -> bool:
+    """Cheap check on the raw update whether any handler could match it.
+
+    Mirrors the filters in ``register_handlers``: photos and videos,
+    commands, plain text in private chats (``survey_answer``) and known
+    button data. Lets the webhook skip building the ``Update`` object graph
+    for stickers, voice messages, text in group chats and the like.
+    """
+    message = data.get("message")
+    if message is not None:
+        if any(key in message for key in MESSAGE_CONTENT):
+            return True
+        # Commands anywhere; plain text only in private chats, where survey_answer takes it.
+        text = message.get("text")
+        return bool(text) and (text[0] == "/" or (message.get("chat") or {}).get("type") == "private")
+
+    callback_query = data.get("callback_query")
+    if callback_query is not None:
+        return (callback_query.get("data") or "").startswith(CALLBACK_PREFIXES)
+
+    return False
@@ -0,0 +1,43 @@
+import json
+from typing import Any, Dict, Optional, Tuple
+
+
+class InlineReplies:
+    """Answers static commands in the body of the webhook response.
+
+    Telegram executes one method call returned from the webhook, which saves
+    the separate ``sendMessage`` request. Payloads are serialized once; only
+    the chat id is appended per request. Only plain ``/command`` messages in
+    private chats are matched, everything else goes through the handlers.
+    """
+
+    def __init__(self, replies: Dict[str, str]) -> None:
+        self._prefixes = {
+            command: (
+                '{"method":"sendMessage","text":' + json.dumps(text, ensure_ascii=False) + ',"chat_id":'
+            ).encode()
+            for command, text in replies.items()
+        }
+
+    def match(self, data: Dict[str, Any]) -> Optional[Tuple[int, bytes]]:
+        message = data.get("message")
+        if not message:
+            return None
+
+        text = message.get("text")
+        chat = message.get("chat") or {}
+        if not text or text[0] != "/" or chat.get("type") != "private":
+            return None
+
+        entities = message.get("entities") or ()
+        if not entities or entities[0].get("type") != "bot_command" or entities[0].get("offset") != 0:
+            return None
+
+        command = text[1:entities[0]["length"]].lower()
+        prefix = self._prefixes.get(command)
+        if prefix is None:
+            # Unknown command or one addressed as /command@botname.
+            return None
+
+        chat_id = chat["id"]
+        return chat_id, prefix + str(chat_id).encode() + b"}"
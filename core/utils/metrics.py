@@ -0,0 +1,311 @@
+import asyncio
+import functools
+import json
+import logging
+import math
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import config
+from core.utils.workers import worker_registry
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+THROUGHPUT_BUCKETS = (64e3, 256e3, 1e6, 4e6, 16e6, 64e6, 256e6)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _state(self) -> List[list]:
+        raise NotImplementedError
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": self._state(),
+        }
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def _state(self) -> List[list]:
+        # Scrapes read from a thread while the loop adds label sets; list() copies atomically.
+        return [[list(labels), value] for labels, value in list(self._values.items())]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, or is read from ``function`` on scrape."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self.function = function
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def _state(self) -> List[list]:
+        if self.function is not None:
+            return [[[], float(self.function())]]
+        return [[list(labels), value] for labels, value in list(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum].
+        self._values: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def time(self, *labels: str) -> "_Timer":
+        return _Timer(self, labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = super().snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        return snapshot
+
+    def _state(self) -> List[list]:
+        return [[list(labels), [list(counts), total]] for labels, (counts, total) in list(self._values.items())]
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Labels) -> None:
+        self._histogram = histogram
+        self._labels = labels
+        self._started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._histogram.observe(time.perf_counter() - self._started, *self._labels)
+
+
+def _merge(target: Dict[str, Any], snapshot: Dict[str, Any]) -> None:
+    for name, metric in snapshot.items():
+        merged = target.setdefault(name, {**metric, "values": {}})
+        for labels, value in metric["values"]:
+            key = tuple(labels)
+            current = merged["values"].get(key)
+            if current is None:
+                merged["values"][key] = value
+            elif metric["kind"] == "histogram":
+                current[0] = [a + b for a, b in zip(current[0], value[0])]
+                current[1] += value[1]
+            else:
+                merged["values"][key] = current + value
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _render(metrics: Dict[str, Any]) -> Iterator[str]:
+    for name, metric in metrics.items():
+        yield f"# HELP {name} {metric['help']}"
+        yield f"# TYPE {name} {metric['kind']}"
+        names = metric["labelnames"]
+        for labels, value in metric["values"].items():
+            if metric["kind"] != "histogram":
+                yield f"{name}{_format_labels(names, labels)} {_format_value(value)}"
+                continue
+
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip(list(metric["buckets"]) + [math.inf], counts):
+                cumulative += count
+                le = 'le="{}"'.format(_format_value(bound))
+                yield f"{name}_bucket{_format_labels(names, labels, le)} {cumulative}"
+            yield f"{name}_sum{_format_labels(names, labels)} {_format_value(total)}"
+            yield f"{name}_count{_format_labels(names, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """In-process metrics in the Prometheus text format.
+
+    Recording is a dict update, cheap enough for the hot path. With several
+    worker processes every process periodically dumps its values to
+    ``directory`` and ``/metrics`` sums the dumps of all live workers, so a
+    scrape sees the whole deployment no matter which worker answers it.
+    """
+
+    def __init__(self, directory: Optional[Path], dump_interval: float) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._dir = directory
+        self._dump_interval = dump_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _register(self, metric: _Metric) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: metric.snapshot() for name, metric in list(self._metrics.items())}
+
+    def render(self) -> str:
+        merged: Dict[str, Any] = {}
+        _merge(merged, self.snapshot())
+        if self._dir is not None:
+            for snapshot in self._peer_snapshots():
+                _merge(merged, snapshot)
+        return "\n".join(_render(merged)) + "\n"
+
+    def _peer_snapshots(self) -> Iterator[Dict[str, Any]]:
+        if not self._dir.is_dir():
+            return
+        for path in self._dir.glob("*.json"):
+            token = path.stem
+            if token == worker_registry.token:
+                continue
+            if not worker_registry.is_alive(token):
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                yield json.loads(path.read_bytes())
+            except (OSError, ValueError):
+                continue
+
+    def dump(self) -> None:
+        self._dir.mkdir(parents=True, exist_ok=True)
+        path = self._dir / f"{worker_registry.token}.json"
+        tmp_path = path.with_suffix(".part")
+        tmp_path.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp_path, path)
+
+    def start(self) -> None:
+        if self._dir is not None and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="metrics-dump")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        (self._dir / f"{worker_registry.token}.json").unlink(missing_ok=True)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.dump)
+            except Exception as exc:
+                logger.warning("Cannot dump metrics: %s", exc)
+            await asyncio.sleep(self._dump_interval)
+
+
+metrics = MetricsRegistry(
+    Path(config.DATA_DIR) / "metrics" if config.WEB_CONCURRENCY > 1 else None,
+    dump_interval=config.METRICS_DUMP_INTERVAL,
+)
+
+UPDATES_RECEIVED = metrics.counter("bot_updates_received_total", "Webhook updates received.", ["type"])
+UPDATES_REJECTED = metrics.counter(
+    "bot_updates_rejected_total", "Webhook updates not queued (duplicate, unhandled, rate_limited, upload_budget, queue_full, draining).", ["reason"]
+)
+WEBHOOK_LATENCY = metrics.histogram("bot_webhook_request_seconds", "Time to acknowledge a webhook request.")
+UPDATES_IN_FLIGHT = metrics.gauge("bot_updates_in_flight", "Updates queued or being handled.")
+HANDLER_LATENCY = metrics.histogram("bot_handler_seconds", "Handler run time.", ["handler"])
+HANDLER_ERRORS = metrics.counter("bot_handler_errors_total", "Handlers that raised.", ["handler"])
+API_LATENCY = metrics.histogram("bot_api_request_seconds", "Bot API call latency.", ["method"])
+API_ERRORS = metrics.counter("bot_api_errors_total", "Failed Bot API calls.", ["method"])
+DOWNLOADS_IN_FLIGHT = metrics.gauge("media_downloads_in_flight", "Download jobs being processed.")
+DOWNLOADS = metrics.counter("media_downloads_total", "Finished download jobs.", ["kind", "status"])
+DOWNLOAD_BYTES = metrics.counter("media_download_bytes_total", "Bytes downloaded from Telegram.")
+DOWNLOAD_THROUGHPUT = metrics.histogram(
+    "media_download_bytes_per_second", "Throughput of single file downloads.", buckets=THROUGHPUT_BUCKETS
+)
+EXPORT_LATENCY = metrics.histogram("media_export_seconds", "Time to build and send an archive.", ["mode"])
+EXPORT_BYTES = metrics.counter("media_export_bytes_total", "Archive bytes sent or built.", ["mode"])
+EXPORT_THROUGHPUT = metrics.histogram(
+    "media_export_bytes_per_second", "Throughput of archive exports.", buckets=THROUGHPUT_BUCKETS
+)
+
+
+def instrument(callback: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Record run time and errors of a handler callback under its name."""
+    name = callback.__name__
+
+    @functools.wraps(callback)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await callback(*args, **kwargs)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_LATENCY.observe(time.perf_counter() - started, name)
+
+    return wrapper
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+import config
+from core.utils.sqlite import SQLiteStore
+
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversation_states (
+    name TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    state BLOB NOT NULL,
+    PRIMARY KEY (name, user_id)
+)
+"""
+
+_COLUMNS = {
+    "updated_at": "REAL",
+}
+
+_Key = Tuple[str, int]
+
+
+class ConversationStore(SQLiteStore):
+    """Write-behind conversation states shared by all worker processes.
+
+    States are read from SQLite once and then served from memory; changes
+    only mark the entry dirty. Every ``flush_interval`` seconds the dirty
+    entries are written in one ``BEGIN IMMEDIATE`` transaction, the only
+    time the store takes the cross-process write lock, and the clean ones
+    are dropped so that states written by other workers are read afresh.
+    When two workers changed the same state, the later change wins.
+    """
+
+    _schema = (_SCHEMA,)
+    _columns = {"conversation_states": _COLUMNS}
+
+    def __init__(self, path: Path, flush_interval: float) -> None:
+        super().__init__(path)
+        self._flush_interval = flush_interval
+        # Cached states, None meaning "no state", and when the changed ones changed.
+        self._states: Dict[_Key, Optional[Any]] = {}
+        self._dirty: Dict[_Key, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="conversation-flush")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        self.close()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self.flush()
+
+    async def get(self, name: str, user_id: int) -> Optional[Any]:
+        key = (name, user_id)
+        if key not in self._states:
+            state = await asyncio.to_thread(self._load, key)
+            # A change made while loading is newer than the stored state.
+            self._states.setdefault(key, state)
+        return self._states[key]
+
+    def set(self, name: str, user_id: int, state: Any) -> None:
+        self._states[(name, user_id)] = state
+        self._dirty[(name, user_id)] = time.time()
+
+    def delete(self, name: str, user_id: int) -> None:
+        self.set(name, user_id, None)
+
+    def _load(self, key: _Key) -> Optional[Any]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT state FROM conversation_states WHERE name = ? AND user_id = ?", key
+            ).fetchone()
+        return orjson.loads(row["state"]) if row else None
+
+    async def flush(self) -> None:
+        """Write the dirty states in one transaction and forget the clean ones."""
+        dirty, self._dirty = self._dirty, {}
+        if dirty:
+            # Serialized here: the loop keeps changing the cached states while the batch is written.
+            batch = []
+            for key, updated_at in dirty.items():
+                state = self._states.get(key)
+                batch.append((key, None if state is None else orjson.dumps(state), updated_at))
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as exc:
+                logger.warning("Cannot persist conversation states, retrying on the next flush: %s", exc)
+                # Keep the batch unless newer changes arrived meanwhile.
+                self._dirty = {**dirty, **self._dirty}
+                return
+
+        for key in [key for key in self._states if key not in self._dirty]:
+            del self._states[key]
+
+    def _write(self, batch: list) -> None:
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO conversation_states (name, user_id, state, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (name, user_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at"
+                " WHERE COALESCE(conversation_states.updated_at, 0) <= excluded.updated_at",
+                [(name, user_id, state, updated_at)
+                 for (name, user_id), state, updated_at in batch if state is not None],
+            )
+            conn.executemany(
+                "DELETE FROM conversation_states"
+                " WHERE name = ? AND user_id = ? AND COALESCE(updated_at, 0) <= ?",
+                [(name, user_id, updated_at) for (name, user_id), state, updated_at in batch if state is None],
+            )
+
+
+conversation_states = ConversationStore(
+    Path(config.DATA_DIR) / "conversations.sqlite3",
+    flush_interval=config.PERSISTENCE_FLUSH_INTERVAL,
+)
@@ -0,0 +1,234 @@
+import asyncio
+import bisect
+import contextlib
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+JSONDict = Dict[str, Any]
+
+# Lower value is served first. Pass as ``rate_limit_args`` to override.
+PRIORITY_USER = 0
+PRIORITY_ADMIN = 1
+PRIORITY_BACKGROUND = 2
+
+_MAX_IDLE_BUCKETS = 10_000
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    chat_id: Optional[int] = field(compare=False)
+    group: bool = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class PriorityRateLimiter(BaseRateLimiter[int]):
+    """Single outbound scheduler for every Bot API request.
+
+    Requests addressed to a chat wait for a global, a per-chat and (for
+    groups and channels) a per-group token bucket. Waiting requests are
+    granted in priority order: replies to applicants before anything sent to
+    the admin chat. ``RetryAfter`` pauses all traffic and the request is
+    retried up to ``max_retries`` times.
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        chat_rate: float,
+        chat_burst: float,
+        group_rate: float,
+        group_burst: float,
+        max_retries: int,
+    ) -> None:
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._group_rate = group_rate
+        self._group_burst = group_burst
+        self._max_retries = max_retries
+        self._chats: Dict[int, TokenBucket] = {}
+        self._groups: Dict[int, TokenBucket] = {}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._resume = asyncio.Event()
+        self._resume.set()
+        self._pump_task: Optional[asyncio.Task] = None
+
+    async def initialize(self) -> None:
+        if self._pump_task is None:
+            self._pump_task = asyncio.create_task(self._pump(), name="outbound-scheduler")
+
+    async def shutdown(self) -> None:
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+            await asyncio.gather(self._pump_task, return_exceptions=True)
+            self._pump_task = None
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, JSONDict, List[JSONDict]]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int],
+    ) -> Union[bool, JSONDict, List[JSONDict]]:
+        chat_id = data.get("chat_id")
+        with contextlib.suppress(ValueError, TypeError):
+            chat_id = int(chat_id)
+        if not isinstance(chat_id, int):
+            chat_id = None
+
+        if rate_limit_args is not None:
+            priority = rate_limit_args
+        elif chat_id is not None and chat_id == config.ADMIN_CHAT_ID:
+            priority = PRIORITY_ADMIN
+        else:
+            priority = PRIORITY_USER
+
+        for attempt in range(self._max_retries + 1):
+            await self._resume.wait()
+            if chat_id is not None:
+                await self._acquire(priority, chat_id)
+
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as exc:
+                if attempt == self._max_retries:
+                    logger.exception("Rate limit hit after maximum of %d retries", self._max_retries)
+                    raise
+                await self._pause(float(exc.retry_after) + 0.1, endpoint)
+
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+    async def _pause(self, delay: float, endpoint: str) -> None:
+        if not self._resume.is_set():
+            await self._resume.wait()
+            return
+        logger.warning("Flood limit hit on %s, pausing outbound requests for %.1fs", endpoint, delay)
+        self._resume.clear()
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._resume.set()
+
+    async def _acquire(self, priority: int, chat_id: int) -> None:
+        waiter = _Waiter(
+            priority=priority,
+            seq=next(self._seq),
+            chat_id=chat_id,
+            # Negative ids are groups, supergroups and channels.
+            group=chat_id < 0,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        bisect.insort(self._waiters, waiter)
+        self._wakeup.set()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with contextlib.suppress(ValueError):
+                self._waiters.remove(waiter)
+            raise
+
+    def _bucket(self, buckets: Dict[int, TokenBucket], key: int, rate: float, burst: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) >= _MAX_IDLE_BUCKETS:
+                now = time.monotonic()
+                for idle in [k for k, b in buckets.items() if b.full(now)]:
+                    del buckets[idle]
+            bucket = buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+    async def _pump(self) -> None:
+        while True:
+            await self._resume.wait()
+            if not self._waiters:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            wait = self._global.delay(now)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            chosen = None
+            buckets: List[TokenBucket] = []
+            wait = float("inf")
+            for waiter in self._waiters:
+                buckets = [self._bucket(self._chats, waiter.chat_id, self._chat_rate, self._chat_burst)]
+                if waiter.group:
+                    buckets.append(self._bucket(self._groups, waiter.chat_id, self._group_rate, self._group_burst))
+                delay = max(bucket.delay(now) for bucket in buckets)
+                if delay == 0:
+                    chosen = waiter
+                    break
+                wait = min(wait, delay)
+
+            if chosen is None:
+                self._wakeup.clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                continue
+
+            self._waiters.remove(chosen)
+            if chosen.future.done():
+                continue
+
+            self._global.take(now)
+            for bucket in buckets:
+                bucket.take(now)
+            chosen.future.set_result(None)
+
+
+# Every worker process gets its share of the bot-wide limits.
+rate_limiter = PriorityRateLimiter(
+    global_rate=config.OUTBOUND_GLOBAL_RATE / config.WEB_CONCURRENCY,
+    chat_rate=config.OUTBOUND_CHAT_RATE / config.WEB_CONCURRENCY,
+    chat_burst=config.OUTBOUND_CHAT_BURST,
+    group_rate=config.OUTBOUND_GROUP_RATE / config.WEB_CONCURRENCY,
+    group_burst=config.OUTBOUND_GROUP_BURST,
+    max_retries=config.OUTBOUND_MAX_RETRIES,
+)
@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # WAL lets several worker processes read and write the same database.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def add_missing_columns(conn: sqlite3.Connection, table: str, columns: Dict[str, str]) -> None:
+    existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for column, column_type in columns.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+class SQLiteStore:
+    """Base of the stores that keep their own SQLite database file.
+
+    The connection is opened on first use and shared by the event loop and
+    worker threads of the process behind ``_lock``. On open, ``_schema``
+    creates the tables, ``_columns`` adds the columns a table gained after
+    its first schema (``{table: {column: type}}``) to older databases, and
+    ``_indexes`` creates the indexes, which may use those columns.
+    """
+
+    _schema: Tuple[str, ...] = ()
+    _columns: Dict[str, Dict[str, str]] = {}
+    _indexes: Tuple[str, ...] = ()
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = connect(self._path)
+            for statement in self._schema:
+                conn.execute(statement)
+            for table, columns in self._columns.items():
+                add_missing_columns(conn, table, columns)
+            for statement in self._indexes:
+                conn.execute(statement)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """A ``BEGIN IMMEDIATE`` transaction, which holds the write lock across processes."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
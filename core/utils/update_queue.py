@@ -0,0 +1,216 @@
+import asyncio
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+import orjson
+from telegram import Update
+
+from core.utils.sqlite import SQLiteStore
+
+
+logger = logging.getLogger(__name__)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_updates (
+    update_id INTEGER PRIMARY KEY,
+    data BLOB NOT NULL
+)
+"""
+
+
+class QueueFull(Exception):
+    pass
+
+
+class UpdateCheckpoint(SQLiteStore):
+    """Acknowledged updates that were not handled before a shutdown.
+
+    Saved as Bot API JSON and taken over by whichever process polls next;
+    every row is handed to exactly one process.
+    """
+
+    _schema = (_SCHEMA,)
+
+    def save(self, updates: List[Update]) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO pending_updates (update_id, data) VALUES (?, ?)",
+                [(update.update_id, orjson.dumps(update.to_dict())) for update in updates],
+            )
+            conn.commit()
+
+    def take(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute("DELETE FROM pending_updates RETURNING update_id, data").fetchall()
+            conn.commit()
+        return [orjson.loads(row["data"]) for row in sorted(rows, key=lambda row: row["update_id"])]
+
+
+def chat_key(update: Update) -> int:
+    if update.effective_chat:
+        return update.effective_chat.id
+    if update.effective_user:
+        return update.effective_user.id
+    return update.update_id
+
+
+class UpdateDispatcher:
+    """Bounded in-process queue drained by a pool of workers.
+
+    Updates of one chat are processed strictly one after another, different
+    chats are processed in parallel by up to ``workers`` tasks.
+
+    With a ``checkpoint``, updates that were still queued when ``stop`` gave
+    up are saved there, and every ``replay_interval`` seconds saved updates
+    (also those of other, stopped processes) are queued again. Replayed
+    updates may run after newer updates of the same chat.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Update], Awaitable[None]],
+        workers: int,
+        max_size: int,
+        checkpoint: Optional[UpdateCheckpoint] = None,
+        decode: Optional[Callable[[Dict[str, Any]], Update]] = None,
+        replay_interval: float = 5.0,
+    ) -> None:
+        self._process = process
+        self._workers = max(1, workers)
+        self._max_size = max(1, max_size)
+        self._checkpoint = checkpoint
+        self._decode = decode
+        self._replay_interval = replay_interval
+        self._replaying: Optional[asyncio.Future] = None
+        self._chats: Dict[int, Deque[Update]] = {}
+        self._running: Set[int] = set()
+        self._ready: "asyncio.Queue[int]" = asyncio.Queue()
+        self._size = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks: List[asyncio.Task] = []
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def has_pending(self, key: int) -> bool:
+        return key in self._chats
+
+    def submit(self, update: Update) -> None:
+        if self._closed or self._size >= self._max_size:
+            raise QueueFull()
+
+        key = chat_key(update)
+        pending = self._chats.get(key)
+        if pending is None:
+            self._chats[key] = deque([update])
+            self._ready.put_nowait(key)
+        else:
+            # The chat is already scheduled or being processed by a worker.
+            pending.append(update)
+
+        self._size += 1
+        self._idle.clear()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._closed = False
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"update-worker-{i}")
+            for i in range(self._workers)
+        ]
+        if self._checkpoint is not None:
+            self._tasks.append(asyncio.create_task(self._replay(), name="update-replay"))
+        logger.info("Update dispatcher started with %s workers", self._workers)
+
+    async def stop(self, timeout: float) -> None:
+        """Stop accepting updates and drain the queue for up to ``timeout`` seconds."""
+        self._closed = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Update dispatcher stopped with %s updates still queued", self._size)
+
+        interrupted = len(self._running)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._replaying is not None:
+            await asyncio.gather(self._replaying, return_exceptions=True)
+            self._replaying = None
+        if interrupted:
+            # A handler cancelled midway may already have had side effects, so it is not replayed.
+            logger.warning("Interrupted %s updates in progress", interrupted)
+
+        leftover = [update for pending in self._chats.values() for update in pending]
+        self._chats.clear()
+        self._ready = asyncio.Queue()
+        self._size = 0
+        self._idle.set()
+        if leftover and self._checkpoint is not None:
+            try:
+                await asyncio.to_thread(self._checkpoint.save, leftover)
+                logger.info("Saved %s unhandled updates for the next process", len(leftover))
+            except Exception:
+                logger.exception("Cannot save %s unhandled updates", len(leftover))
+
+    async def _replay(self) -> None:
+        while True:
+            self._replaying = asyncio.ensure_future(self._replay_once())
+            # Taken rows are already deleted: a running step must finish even if this loop is cancelled.
+            await asyncio.shield(self._replaying)
+            await asyncio.sleep(self._replay_interval)
+
+    async def _replay_once(self) -> None:
+        try:
+            saved = await asyncio.to_thread(self._checkpoint.take)
+        except Exception as exc:
+            logger.warning("Cannot read saved updates: %s", exc)
+            return
+
+        updates = [self._decode(data) for data in saved]
+        for index, update in enumerate(updates):
+            try:
+                self.submit(update)
+            except QueueFull:
+                # Also once stop() closed the queue; the rest goes back for the next process.
+                await asyncio.to_thread(self._checkpoint.save, updates[index:])
+                break
+        if saved:
+            logger.info("Replaying %s saved updates", len(saved))
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._ready.get()
+            pending = self._chats[key]
+            # Keep the update in the deque while it runs so that `submit`
+            # does not schedule the same chat on a second worker.
+            update = pending[0]
+            self._running.add(key)
+            try:
+                await self._process(update)
+            except Exception:
+                logger.exception("Failed to process update %s", update.update_id)
+            finally:
+                self._running.discard(key)
+                pending.popleft()
+                self._size -= 1
+                if pending:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._chats[key]
+                if self._size == 0:
+                    self._idle.set()
@@ -0,0 +1,91 @@
+import fcntl
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import IO, Optional
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+def _try_lock(handle: IO) -> bool:
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+class WorkerRegistry:
+    """Coordinates the worker processes of one deployment via file locks.
+
+    Every process holds an exclusive lock on ``<dir>/<token>.lock`` while it
+    lives, so other processes can tell whether the owner of a persisted job
+    is still running. The process that holds ``leader.lock`` configures the
+    bot (webhook, commands, admin notification) and runs the retention
+    sweeps; the others keep retrying and take over when it exits. Locks are
+    released by the kernel when a process dies.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self._dir = directory
+        self.token = uuid.uuid4().hex
+        self._worker_handle: Optional[IO] = None
+        self._leader_handle: Optional[IO] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader_handle is not None
+
+    def register(self) -> None:
+        if self._worker_handle is not None:
+            return
+        self._dir.mkdir(parents=True, exist_ok=True)
+        handle = (self._dir / f"{self.token}.lock").open("w")
+        _try_lock(handle)
+        self._worker_handle = handle
+
+    def acquire_leadership(self) -> bool:
+        if self._leader_handle is not None:
+            return True
+        self._dir.mkdir(parents=True, exist_ok=True)
+        handle = (self._dir / "leader.lock").open("w")
+        if not _try_lock(handle):
+            handle.close()
+            return False
+
+        handle.write(f"{os.getpid()}\n")
+        handle.flush()
+        self._leader_handle = handle
+        logger.info("Worker %s (pid %s) is the leader", self.token, os.getpid())
+        return True
+
+    def is_alive(self, token: str) -> bool:
+        if token == self.token:
+            return True
+        path = self._dir / f"{token}.lock"
+        try:
+            handle = path.open("a")
+        except FileNotFoundError:
+            return False
+
+        with handle:
+            if not _try_lock(handle):
+                return True
+            path.unlink(missing_ok=True)
+            return False
+
+    def close(self) -> None:
+        for handle in (self._leader_handle, self._worker_handle):
+            if handle is not None:
+                handle.close()
+        if self._worker_handle is not None:
+            (self._dir / f"{self.token}.lock").unlink(missing_ok=True)
+        self._leader_handle = None
+        self._worker_handle = None
+
+
+worker_registry = WorkerRegistry(Path(config.DATA_DIR) / "workers")
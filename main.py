@@ -1,13 +1,20 @@
-import io
+import asyncio
+import json
 import logging
-import shutil
-import zipfile
+import os
+import time
 from contextlib import asynccontextmanager
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from html import escape
 from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import quote
 
-from fastapi import BackgroundTasks, FastAPI, Request
-from fastapi.responses import HTMLResponse, StreamingResponse
+import orjson
+from fastapi import BackgroundTasks, FastAPI, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
 from telegram import Update
 from telegram.ext import (
     Application,
@@ -20,6 +27,7 @@ from telegram.ext import (
 
 import config
 from core.hendlers.basic import (
+    STATIC_REPLIES,
     about_platform,
     equipment_help,
     get_photo,
@@ -35,7 +43,37 @@ from core.hendlers.basic import (
     stylist_recruiter_experience,
 )
 from core.hendlers.callback import model_order
-from core.utils.comands import set_commands
+from core.hendlers.survey import cancel_survey, start_survey, survey_answer
+from core.media.albums import album_batcher
+from core.media.archive import stream_zip
+from core.media.catalog import MediaEntry, catalog
+from core.media.downloads import download_pipeline
+from core.media.exports import media_exporter
+from core.media.previews import preview_renderer
+from core.media.retention import media_retention
+from core.utils.admin_notify import admin_notifier
+from core.utils.comands import sync_commands
+from core.utils.dedup import peek_update_id, update_deduplicator
+from core.utils.http import build_api_request, file_client
+from core.utils.inbound_limiter import inbound_limiter
+from core.utils.ingress import ALLOWED_UPDATES, is_handled
+from core.utils.inline_replies import InlineReplies
+from core.utils.metrics import (
+    CONTENT_TYPE,
+    EXPORT_BYTES,
+    EXPORT_LATENCY,
+    EXPORT_THROUGHPUT,
+    UPDATES_IN_FLIGHT,
+    UPDATES_RECEIVED,
+    UPDATES_REJECTED,
+    WEBHOOK_LATENCY,
+    instrument,
+    metrics,
+)
+from core.utils.persistence import conversation_states
+from core.utils.rate_limiter import rate_limiter
+from core.utils.update_queue import QueueFull, UpdateCheckpoint, UpdateDispatcher
+from core.utils.workers import worker_registry
 
 
 # ---------------------------------------------------------
@@ -70,21 +108,38 @@ logger.info(f"Webhook will be set to: {FULL_WEBHOOK_URL}")
 # Telegram Application
 # ---------------------------------------------------------
 
-application = Application.builder().token(TELEGRAM_API_KEY).build()
+application = (
+    Application.builder()
+    .token(TELEGRAM_API_KEY)
+    .base_url(config.BOT_API_BASE_URL)
+    .base_file_url(config.BOT_API_FILE_URL)
+    .local_mode(config.BOT_API_LOCAL_MODE)
+    .request(build_api_request())
+    .rate_limiter(rate_limiter)
+    .build()
+)
+
+
+def _error_origin(update: object) -> str:
+    if not isinstance(update, Update):
+        return "error_handler"
+    message = update.effective_message
+    if message and message.text and message.text.startswith("/"):
+        # Only commands: free text is user content and would split the digest into one entry per message.
+        return message.text.split()[0].split("@")[0][:32]
+    if update.callback_query:
+        return "callback_query"
+    if message:
+        kind = "photo" if message.photo else "video" if message.video else "text" if message.text else "other"
+        return f"message:{kind}"
+    return "update"
 
 
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.exception("Unhandled error occurred", exc_info=context.error)
 
-    msg = "Произошла ошибка"
     if context.error:
-        msg += f": {context.error}"
-
-    if ADMIN_CHAT_ID:
-        try:
-            await context.bot.send_message(chat_id=ADMIN_CHAT_ID, text=msg)
-        except Exception:
-            pass
+        admin_notifier.report(_error_origin(update), context.error)
 
     if isinstance(update, Update) and update.effective_message:
         try:
@@ -94,98 +149,157 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
 
 
 def register_handlers(app: Application):
-    app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("model", model_recruiter_experience))
-    app.add_handler(CommandHandler("photographer", photographer_recruiter_experience))
-    app.add_handler(CommandHandler("makeup", makeup_recruiter_experience))
-    app.add_handler(CommandHandler("stylist", stylist_recruiter_experience))
-    app.add_handler(CommandHandler("about_platform", about_platform))
-    app.add_handler(CommandHandler("equipment", equipment_help))
-    app.add_handler(CommandHandler("privacy_rules", privacy_rules))
-    app.add_handler(CommandHandler("help", help_command))
-    app.add_handler(CommandHandler("portfolio", portfolio_requirements))
-    app.add_handler(CommandHandler("next_steps", next_steps))
-
-    app.add_handler(CallbackQueryHandler(model_order, pattern="^model_order_"))
-
-    app.add_handler(MessageHandler(filters.PHOTO, get_photo))
-    app.add_handler(MessageHandler(filters.VIDEO, get_video))
+    app.add_handler(CommandHandler("start", instrument(start)))
+    app.add_handler(CommandHandler("model", instrument(model_recruiter_experience)))
+    app.add_handler(CommandHandler("photographer", instrument(photographer_recruiter_experience)))
+    app.add_handler(CommandHandler("makeup", instrument(makeup_recruiter_experience)))
+    app.add_handler(CommandHandler("stylist", instrument(stylist_recruiter_experience)))
+    app.add_handler(CommandHandler("about_platform", instrument(about_platform)))
+    app.add_handler(CommandHandler("equipment", instrument(equipment_help)))
+    app.add_handler(CommandHandler("privacy_rules", instrument(privacy_rules)))
+    app.add_handler(CommandHandler("help", instrument(help_command)))
+    app.add_handler(CommandHandler("portfolio", instrument(portfolio_requirements)))
+    app.add_handler(CommandHandler("next_steps", instrument(next_steps)))
+
+    # Survey state lives in the shared conversation store, not in a ConversationHandler.
+    app.add_handler(CallbackQueryHandler(instrument(model_order), pattern="^model_order_"))
+    app.add_handler(CommandHandler("survey", instrument(start_survey)))
+    app.add_handler(CommandHandler("cancel", instrument(cancel_survey)))
+    app.add_handler(
+        MessageHandler(filters.TEXT & ~filters.COMMAND & filters.ChatType.PRIVATE, instrument(survey_answer))
+    )
+
+    app.add_handler(MessageHandler(filters.PHOTO, instrument(get_photo)))
+    app.add_handler(MessageHandler(filters.VIDEO, instrument(get_video)))
 
     app.add_error_handler(error_handler)
 
 
 register_handlers(application)
 
+inline_replies = InlineReplies(STATIC_REPLIES)
+
+update_checkpoint = UpdateCheckpoint(Path(config.DATA_DIR) / "pending_updates.sqlite3")
+
+dispatcher = UpdateDispatcher(
+    application.process_update,
+    workers=config.UPDATE_WORKERS,
+    max_size=config.UPDATE_QUEUE_SIZE,
+    checkpoint=update_checkpoint,
+    decode=lambda data: Update.de_json(data, application.bot),
+    replay_interval=config.UPDATE_REPLAY_INTERVAL,
+)
+UPDATES_IN_FLIGHT.function = lambda: dispatcher.size
+
+# Fire-and-forget tasks, referenced until they finish.
+_background_tasks: Set[asyncio.Task] = set()
+
 
 # ---------------------------------------------------------
 # Lifespan (startup + shutdown)
 # ---------------------------------------------------------
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+async def _sync_webhook() -> None:
+    info = await application.bot.get_webhook_info()
+    allowed_updates = set(ALLOWED_UPDATES)
+    if info.url == FULL_WEBHOOK_URL and set(info.allowed_updates or ()) == allowed_updates:
+        logger.info("Webhook already set: %s", FULL_WEBHOOK_URL)
+        return
 
-    Path("media").mkdir(parents=True, exist_ok=True)
+    # Pending updates are kept: Telegram delivers them once the webhook is in place.
+    await application.bot.set_webhook(FULL_WEBHOOK_URL, allowed_updates=ALLOWED_UPDATES)
+    logger.info(f"Webhook set: {FULL_WEBHOOK_URL}")
 
-    await application.initialize()
-    await application.start()
 
-    # set commands
+async def _sync_commands() -> None:
     try:
-        await set_commands(application.bot)
-        logger.info("Bot commands set successfully")
+        await sync_commands(application.bot)
     except Exception as e:
         logger.warning(f"Cannot set commands: {e}")
 
-    # delete previous webhook and drop pending updates
+
+async def _notify_started() -> None:
     try:
-        await application.bot.delete_webhook(drop_pending_updates=True)
-    except Exception as e:
-        logger.warning(f"Cannot delete webhook before setting a new one: {e}")
+        await application.bot.send_message(chat_id=ADMIN_CHAT_ID, text="Бот запущен (webhook mode)")
+    except Exception:
+        pass
 
-    # install new webhook
-    await application.bot.set_webhook(
-        FULL_WEBHOOK_URL,
-        allowed_updates=Update.ALL_TYPES,
-        drop_pending_updates=True,
-    )
-    logger.info(f"Webhook set: {FULL_WEBHOOK_URL}")
 
-    if application.running:
-        logger.info("Telegram application already running; skipping start")
-    else:
-        await application.start()
+async def _configure_bot() -> None:
+    # Only calls that change something hit the Bot API, and independent ones run together.
+    await asyncio.gather(_sync_webhook(), _sync_commands())
 
-    # notify admin
     if ADMIN_CHAT_ID:
-        try:
-            await application.bot.send_message(chat_id=ADMIN_CHAT_ID, text="Бот запущен (webhook mode)")
-        except Exception:
-            pass
+        _background_tasks.add(task := asyncio.create_task(_notify_started()))
+        task.add_done_callback(_background_tasks.discard)
 
-    yield
 
-    # remove webhook
+async def _await_leadership() -> None:
+    # E.g. in a rolling restart the previous instance still holds the lock while this one boots.
+    while not worker_registry.acquire_leadership():
+        await asyncio.sleep(config.LEADER_RETRY_INTERVAL)
     try:
-        await application.bot.delete_webhook()
-    except Exception:
-        pass
+        await _configure_bot()
+    except Exception as e:
+        logger.warning(f"Cannot configure the bot after taking over leadership: {e}")
 
-    if application.running:
-        try:
-            await application.stop()
-        except Exception:
-            pass
 
-    try:
-        await application.stop()
-    except Exception:
-        pass
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+
+    Path(config.MEDIA_DIR).mkdir(parents=True, exist_ok=True)
+
+    await application.initialize()
+    await application.start()
+
+    worker_registry.register()
+    # With several uvicorn workers only the leader configures the bot; the others
+    # keep trying and configure it once they take over.
+    leadership = None
+    if worker_registry.acquire_leadership():
+        await _configure_bot()
+    else:
+        logger.info("Another worker is the leader; waiting to take over webhook and command setup")
+        leadership = asyncio.create_task(_await_leadership(), name="leadership")
+    # Backfills the catalog and applies retention while this worker is the leader.
+    media_retention.start()
+
+    metrics.start()
+    admin_notifier.start(application.bot)
+    await download_pipeline.start(application.bot)
+    album_batcher.start(application.bot)
+    conversation_states.start()
+    await dispatcher.start()
+
+    yield
 
+    # Drain: the webhook answers 503 from here on, so Telegram holds new updates for the next instance.
+    await dispatcher.stop(config.UPDATE_DRAIN_TIMEOUT)
+    if leadership is not None:
+        leadership.cancel()
+        await asyncio.gather(leadership, return_exceptions=True)
+    await media_retention.stop()
+    await album_batcher.stop()
+    await conversation_states.stop()
+    await download_pipeline.stop(config.DOWNLOAD_DRAIN_TIMEOUT)
+    await admin_notifier.stop()
+    await metrics.stop()
+    await file_client.close()
+
+    # The webhook stays registered: Telegram keeps retrying updates until the next instance is up.
     try:
+        await application.stop()
         await application.shutdown()
     except Exception:
         pass
 
+    media_exporter.shutdown()
+    preview_renderer.shutdown()
+    catalog.close()
+    update_deduplicator.close()
+    update_checkpoint.close()
+    worker_registry.close()
+
 
 # ---------------------------------------------------------
 # FastAPI app
@@ -208,26 +322,350 @@ async def root():
 # ---------------------------------------------------------
 @app.post(WEBHOOK_PATH)
 async def telegram_webhook(request: Request):
-    data = await request.json()
+    with WEBHOOK_LATENCY.time():
+        return await _handle_webhook(request)
+
+
+OK_RESPONSE = b'{"ok":true}'
+
+
+def _duplicate(update_id: int) -> Response:
+    logger.info("Dropping redelivered update %s", update_id)
+    UPDATES_REJECTED.inc("duplicate")
+    return Response(OK_RESPONSE, media_type="application/json")
+
+
+async def _handle_webhook(request: Request):
+    if dispatcher.closed:
+        # Shutting down: Telegram retries, and the retry reaches the next instance.
+        UPDATES_REJECTED.inc("draining")
+        return JSONResponse({"ok": False}, status_code=503, headers={"Retry-After": "1"})
+
+    body = await request.body()
+
+    # Redeliveries to this process are dropped from memory, before anything else.
+    update_id = peek_update_id(body)
+    if update_id is not None and update_deduplicator.seen(update_id):
+        return _duplicate(update_id)
+
+    data = orjson.loads(body)
+    if update_id is None:
+        update_id = data["update_id"]
+        if update_deduplicator.seen(update_id):
+            return _duplicate(update_id)
+
+    UPDATES_RECEIVED.inc(next((key for key in data if key != "update_id"), "unknown"))
+
+    # No handler would match (see is_handled): skip building the Update object graph altogether.
+    if not is_handled(data):
+        UPDATES_REJECTED.inc("unhandled")
+        return Response(OK_RESPONSE, media_type="application/json")
+
+    # Over-limit updates are acknowledged and dropped before any download starts.
+    limited = inbound_limiter.check(data) if inbound_limiter.enabled else None
+    if limited is not None:
+        reason, notice = limited
+        UPDATES_REJECTED.inc(reason)
+        return Response(notice or OK_RESPONSE, media_type="application/json")
+
+    # Only updates that will be answered are recorded for the other workers and the next run.
+    if not await update_deduplicator.claim(update_id):
+        return _duplicate(update_id)
+
+    inline_reply = inline_replies.match(data)
+    # Only when nothing older from this chat is still queued, to keep replies in order.
+    if inline_reply is not None and not dispatcher.has_pending(inline_reply[0]):
+        return Response(content=inline_reply[1], media_type="application/json")
+
     update = Update.de_json(data, application.bot)
 
-    # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ
-    await application.process_update(update)
+    # Acknowledge right away; handlers run on the dispatcher workers.
+    try:
+        dispatcher.submit(update)
+    except QueueFull:
+        logger.warning("Update queue is full, asking Telegram to retry update %s", update.update_id)
+        UPDATES_REJECTED.inc("queue_full")
+        await update_deduplicator.forget(update.update_id)
+        return JSONResponse({"ok": False}, status_code=503, headers={"Retry-After": "1"})
+
+    return Response(OK_RESPONSE, media_type="application/json")
 
-    return {"ok": True}
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return Response(await run_in_threadpool(metrics.render), media_type=CONTENT_TYPE)
 
 # ---------------------------------------------------------
 # Media archive endpoints
 # ---------------------------------------------------------
 
-def _create_media_archive(buffer: io.BytesIO, media_dir: Path) -> int:
-    files = [p for p in media_dir.rglob("*") if p.is_file()]
+REVIEW_PAGE_SIZE = 60
+REVIEW_USERS_PAGE_SIZE = 100
 
-    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
-        for file_path in files:
-            z.write(file_path, file_path.relative_to(media_dir))
+MEDIA_KINDS = ("photos", "videos")
 
-    return len(files)
+
+def _entry_json(entry: MediaEntry) -> dict:
+    return {
+        "id": entry.id,
+        "user": entry.user,
+        "type": entry.kind,
+        "path": entry.path,
+        "size": entry.size,
+        "sha256": entry.sha256,
+        "received_at": datetime.fromtimestamp(entry.received_at, timezone.utc).isoformat(),
+        "chat_id": entry.chat_id,
+        "user_id": entry.user_id,
+        "message_id": entry.message_id,
+        "file_id": entry.file_id,
+        "file_unique_id": entry.file_unique_id,
+    }
+
+
+def _media_archive_entries(media_dir: Path) -> Tuple[List[Tuple[Path, str]], List[int]]:
+    entries = []
+    entry_ids = []
+    for entry in catalog.iter_all():
+        path = media_dir / entry.path
+        if path.is_file():
+            entries.append((path, entry.path))
+            entry_ids.append(entry.id)
+    return entries, entry_ids
+
+
+def _finish_export(entry_ids: List[int]) -> None:
+    # Only the entries that were exported; files that arrived meanwhile are kept.
+    catalog.mark_exported(entry_ids)
+    media_retention.sweep()
+
+
+def _measured_export(chunks: Iterator[bytes], mode: str,
+                     on_complete: Optional[Callable[[], None]] = None) -> Iterator[bytes]:
+    started = time.perf_counter()
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        yield chunk
+    # Reached only once the last chunk was sent: a disconnect closes the generator at a yield above.
+    elapsed = time.perf_counter() - started
+    EXPORT_LATENCY.observe(elapsed, mode)
+    EXPORT_BYTES.inc(mode, amount=size)
+    if elapsed > 0:
+        EXPORT_THROUGHPUT.observe(size / elapsed)
+    if on_complete is not None:
+        on_complete()
+
+
+def _incremental_export(media_dir: Path, since: int, limit: int) -> Tuple[List[Tuple[Path, str]], dict]:
+    rows = catalog.page(since, limit)
+    entries = [entry for entry in rows if (media_dir / entry.path).is_file()]
+    # Advance past rows whose files are gone too, or a page of them would be served forever.
+    next_cursor = rows[-1].id if rows else since
+
+    manifest = {
+        "cursor": since,
+        "next_cursor": next_cursor,
+        "files": [_entry_json(entry) for entry in entries],
+    }
+    return [(media_dir / entry.path, entry.path) for entry in entries], manifest
+
+
+@app.get("/media/catalog")
+async def media_catalog(
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    user: Optional[str] = None,
+    kind: Optional[str] = Query(None, pattern="^(photos|videos)$"),
+):
+    entries = await run_in_threadpool(catalog.page, after, limit, user, kind)
+    return {
+        "items": [_entry_json(entry) for entry in entries],
+        "next": entries[-1].id if len(entries) == limit else None,
+    }
+
+
+@app.get("/media/catalog/users")
+async def media_catalog_users(
+    after: str = "",
+    limit: int = Query(100, ge=1, le=1000),
+):
+    users = await run_in_threadpool(catalog.users, after, limit)
+    for user in users:
+        for field in ("first_received_at", "last_received_at"):
+            user[field] = datetime.fromtimestamp(user[field], timezone.utc).isoformat()
+    return {
+        "items": users,
+        "next": users[-1]["user"] if len(users) == limit else None,
+    }
+
+
+@app.get("/media/review", response_class=HTMLResponse)
+async def media_review(after: str = ""):
+    # Same cursor as /media/catalog/users: the last user name of the previous page.
+    users = await run_in_threadpool(catalog.users, after, REVIEW_USERS_PAGE_SIZE)
+    rows = "".join(
+        f"<li><a href='/media/review/{quote(user['user'])}'>{escape(user['user'])}</a>"
+        f" — {user['photos']} photos, {user['videos']} videos</li>"
+        for user in users
+    )
+    more = ""
+    if len(users) == REVIEW_USERS_PAGE_SIZE:
+        more = f"<p><a href='/media/review?after={quote(users[-1]['user'])}'>More</a></p>"
+    return f"""
+    <html>
+        <body>
+            <h1>Applicants</h1>
+            <ul>{rows}</ul>
+            {more}
+        </body>
+    </html>
+    """
+
+
+@app.get("/media/review/{user}", response_class=HTMLResponse)
+async def media_review_user(user: str, after: int = Query(0, ge=0)):
+    entries = await run_in_threadpool(catalog.page, after, REVIEW_PAGE_SIZE, user)
+    tiles = "".join(
+        f"<figure style='display:inline-block;margin:4px'>"
+        f"<a href='/media/{quote(entry.path)}'>"
+        f"<img src='/media/thumbnails/{entry.id}' loading='lazy' alt='{entry.kind}'"
+        f" width='{config.PREVIEW_SIZE}'></a>"
+        f"<figcaption>{entry.kind[:-1]}, {entry.size // 1024} KB</figcaption></figure>"
+        for entry in entries
+    )
+    more = ""
+    if len(entries) == REVIEW_PAGE_SIZE:
+        more = f"<p><a href='/media/review/{quote(user)}?after={entries[-1].id}'>More</a></p>"
+    return f"""
+    <html>
+        <body>
+            <h1>{escape(user)}</h1>
+            <p><a href='/media/review'>All applicants</a></p>
+            {tiles}
+            {more}
+        </body>
+    </html>
+    """
+
+
+@app.get("/media/thumbnails/{entry_id}")
+async def media_thumbnail(entry_id: int):
+    entry = await run_in_threadpool(catalog.get, entry_id)
+    thumbnail = await preview_renderer.thumbnail(entry) if entry else None
+    if thumbnail is None:
+        return JSONResponse({"error": "No preview available"}, status_code=404)
+
+    # The cache file is keyed by content hash, so it never changes.
+    return FileResponse(
+        thumbnail,
+        media_type="image/jpeg",
+        headers={"Cache-Control": "private, max-age=31536000, immutable"},
+    )
+
+
+def _export_json(manifest: dict) -> dict:
+    parts = []
+    for part in manifest["parts"]:
+        part = {key: value for key, value in part.items() if key != "entry_ids"}
+        if part["status"] == "ready":
+            part["url"] = f"/media/exports/{manifest['id']}/parts/{part['name']}"
+        parts.append(part)
+    created_at = datetime.fromtimestamp(manifest["created_at"], timezone.utc).isoformat()
+    return {**manifest, "created_at": created_at, "parts": parts}
+
+
+@app.post("/media/exports")
+async def create_media_export(
+    split: str = Query("size", pattern="^(size|user)$"),
+    part_mb: int = Query(config.EXPORT_PART_MB, ge=0),
+):
+    # Parts are built in the background; poll the export until it is ready.
+    manifest = await run_in_threadpool(media_exporter.create, split == "user", part_mb * 1024 * 1024)
+    if manifest is None:
+        return {"error": "No files found"}
+    return JSONResponse(_export_json(manifest), status_code=202)
+
+
+@app.get("/media/exports/{export_id}")
+async def media_export_status(export_id: str):
+    manifest = await run_in_threadpool(media_exporter.status, export_id)
+    if manifest is None:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    return _export_json(manifest)
+
+
+@app.get("/media/exports/{export_id}/parts/{name}")
+async def media_export_part(export_id: str, name: str):
+    path = await run_in_threadpool(media_exporter.part_path, export_id, name)
+    if path is None:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    # Range requests let a client resume or fetch parts in parallel.
+    return FileResponse(path, media_type="application/zip", filename=f"media_{export_id}_{name}")
+
+
+@app.post("/media/exports/{export_id}/complete")
+async def complete_media_export(export_id: str, background_tasks: BackgroundTasks):
+    entry_ids = await run_in_threadpool(media_exporter.complete, export_id)
+    if entry_ids is None:
+        return JSONResponse({"error": "Export not found or not ready"}, status_code=409)
+    background_tasks.add_task(_finish_export, entry_ids)
+    return {"exported": len(entry_ids)}
+
+
+@app.delete("/media/exports/{export_id}")
+async def discard_media_export(export_id: str):
+    if not await run_in_threadpool(media_exporter.discard, export_id):
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    return {"ok": True}
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+@app.get("/media/{user}/{kind}/{name}")
+async def media_file(user: str, kind: str, name: str, request: Request):
+    # Hidden folders (.blobs, .tmp) and anything outside user folders are not served.
+    if kind not in MEDIA_KINDS or user.startswith(".") or name.startswith("."):
+        return JSONResponse({"error": "Not found"}, status_code=404)
+
+    path = Path(config.MEDIA_DIR) / user / kind / name
+    try:
+        stat = await run_in_threadpool(os.stat, path)
+    except (FileNotFoundError, NotADirectoryError):
+        return JSONResponse({"error": "Not found"}, status_code=404)
+
+    headers = {"Cache-Control": "private, max-age=3600"}
+    stem = Path(name).stem
+    if len(stem) == 64 and all(char in "0123456789abcdef" for char in stem):
+        # Content-addressed files are named by their sha256: a strong ETag for free.
+        headers["ETag"] = f'"{stem}"'
+
+    # FileResponse handles Range/If-Range and lets the server send the file itself.
+    response = FileResponse(
+        path,
+        headers=headers,
+        stat_result=stat,
+        filename=name,
+        content_disposition_type="inline",
+    )
+    if _not_modified(request, response.headers["etag"], stat.st_mtime):
+        return Response(
+            status_code=304,
+            headers={key: response.headers[key] for key in ("etag", "last-modified", "cache-control")},
+        )
+    return response
 
 
 @app.get("/media", response_class=HTMLResponse)
@@ -237,31 +675,56 @@ async def media_page():
         <body>
             <h1>Download all media</h1>
             <p><a href='/media/download'>Download archive</a></p>
+            <p><a href='/media/download?since=0'>Download new files since cursor 0</a></p>
+            <form method='post' action='/media/exports?split=user'>
+                <button>Build an archive in parts, one per applicant</button>
+            </form>
+            <p><a href='/media/review'>Review applicants</a></p>
+            <p><a href='/media/catalog'>Browse the media catalog</a></p>
+            <p><a href='/media/catalog/users'>Applicants</a></p>
         </body>
     </html>
     """
 
 
 @app.get("/media/download")
-async def download_media(background_tasks: BackgroundTasks):
-    media_dir = Path("media")
+async def download_media(
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    media_dir = Path(config.MEDIA_DIR)
 
     if not media_dir.exists():
         return {"error": "No media available"}
 
-    buffer = io.BytesIO()
-    count = _create_media_archive(buffer, media_dir)
-
-    if count == 0:
+    if since is not None:
+        # Incremental export: nothing is deleted, the client keeps the cursor.
+        entries, manifest = await run_in_threadpool(_incremental_export, media_dir, since, limit)
+        if not entries:
+            return manifest
+
+        filename = f"media_{since}_{manifest['next_cursor']}.zip"
+        return StreamingResponse(
+            _measured_export(
+                stream_zip(entries, extra={"manifest.json": json.dumps(manifest, ensure_ascii=False, indent=2).encode()}),
+                "incremental",
+            ),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}",
+                "X-Next-Cursor": str(manifest["next_cursor"]),
+            },
+        )
+
+    entries, entry_ids = await run_in_threadpool(_media_archive_entries, media_dir)
+
+    if not entries:
         return {"error": "No files found"}
 
-    buffer.seek(0)
     filename = f"media_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.zip"
 
-    background_tasks.add_task(shutil.rmtree, media_dir, ignore_errors=True)
-
     return StreamingResponse(
-        iter([buffer.getvalue()]),
+        _measured_export(stream_zip(entries), "full", on_complete=lambda: _finish_export(entry_ids)),
         media_type="application/zip",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
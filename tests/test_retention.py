@@ -0,0 +1,104 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from core.media.catalog import MediaCatalog, MediaEntry
+from core.media.previews import PreviewRenderer
+from core.media.retention import MediaRetention
+from core.media.store import MediaStore
+
+
+@pytest.fixture
+def media_catalog(tmp_path: Path):
+    media_catalog = MediaCatalog(tmp_path / "media.sqlite3")
+    yield media_catalog
+    media_catalog.close()
+
+
+@pytest.fixture
+def store(tmp_path: Path, media_catalog: MediaCatalog) -> MediaStore:
+    return MediaStore(tmp_path / "media", media_catalog)
+
+
+def _retention(tmp_path: Path, store: MediaStore, quota: int = 0, exported_ttl: float = 0) -> MediaRetention:
+    previews = PreviewRenderer(store.root, tmp_path / "previews", workers=1, size=64)
+    return MediaRetention(store, store.catalog, previews, quota=quota, exported_ttl=exported_ttl,
+                          tmp_ttl=3600, interval=60)
+
+
+def _add(store: MediaStore, user: str, content: bytes, file_unique_id: Optional[str]) -> MediaEntry:
+    sha256 = hashlib.sha256(content).hexdigest()
+    blob = store.blob_path(sha256, ".jpg")
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    if not blob.exists():
+        blob.write_bytes(content)
+    target = store.user_path(user, "photos", sha256, ".jpg")
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.link(blob, target)
+    entry_id = store.catalog.add(user, "photos", target.relative_to(store.root).as_posix(), len(content), sha256,
+                                 file_unique_id=file_unique_id)
+    return store.catalog.get(entry_id)
+
+
+def _ids(media_catalog: MediaCatalog):
+    return [entry.id for entry in media_catalog.iter_all()]
+
+
+def test_sweep_deletes_only_exported_entries(tmp_path, store, media_catalog):
+    exported = _add(store, "anna", b"exported", "a")
+    kept = _add(store, "anna", b"kept", "b")
+    media_catalog.mark_exported([exported.id])
+
+    assert _retention(tmp_path, store).sweep() == 1
+
+    assert _ids(media_catalog) == [kept.id]
+    assert not (store.root / exported.path).exists()
+    assert not store.blob_path(exported.sha256, ".jpg").exists()
+    assert (store.root / kept.path).exists()
+    assert store.blob_path(kept.sha256, ".jpg").exists()
+
+
+def test_shared_blob_survives_until_its_last_entry(tmp_path, store, media_catalog):
+    exported = _add(store, "anna", b"same", "a")
+    other_user = _add(store, "bella", b"same", "a")
+    media_catalog.mark_exported([exported.id])
+
+    _retention(tmp_path, store).sweep()
+
+    assert not (store.root / exported.path).exists()
+    assert (store.root / other_user.path).read_bytes() == b"same"
+    assert store.blob_path(exported.sha256, ".jpg").exists()
+
+
+@pytest.mark.parametrize("other_unique_id", ["b", None], ids=["other_file_unique_id", "backfilled"])
+def test_shared_user_path_survives(tmp_path, store, media_catalog, other_unique_id):
+    exported = _add(store, "anna", b"same", "a")
+    other = _add(store, "anna", b"same", other_unique_id)
+    assert other.path == exported.path
+    media_catalog.mark_exported([exported.id])
+
+    _retention(tmp_path, store).sweep()
+
+    assert _ids(media_catalog) == [other.id]
+    assert (store.root / other.path).read_bytes() == b"same"
+    assert store.blob_path(other.sha256, ".jpg").exists()
+
+
+def test_quota_evicts_exported_files_first_then_the_oldest(tmp_path, store, media_catalog):
+    oldest = _add(store, "anna", b"1" * 100, "a")
+    exported = _add(store, "anna", b"2" * 100, "b")
+    newest = _add(store, "anna", b"3" * 100, "c")
+    media_catalog.mark_exported([exported.id])
+
+    # Exported files are only removed by the quota here.
+    _retention(tmp_path, store, quota=200, exported_ttl=3600).sweep()
+    assert _ids(media_catalog) == [oldest.id, newest.id]
+
+    _retention(tmp_path, store, quota=100, exported_ttl=3600).sweep()
+    assert _ids(media_catalog) == [newest.id]
+    assert not (store.root / oldest.path).exists()
+    assert (store.root / newest.path).exists()